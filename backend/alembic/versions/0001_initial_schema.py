@@ -0,0 +1,77 @@
+"""initial schema
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_initial_schema"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "authors",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("is_ai", sa.Boolean(), server_default="false"),
+        sa.Column("avatar", sa.String(), nullable=True),
+    )
+    op.create_index("ix_authors_id", "authors", ["id"])
+    op.create_index("ix_authors_username", "authors", ["username"], unique=True)
+    op.create_index("ix_authors_email", "authors", ["email"], unique=True)
+
+    op.create_table(
+        "personalities",
+        sa.Column("id", sa.Integer(), sa.ForeignKey("authors.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("hobbies", postgresql.ARRAY(sa.String()), nullable=True),
+        sa.Column("directives", postgresql.JSONB(), nullable=True),
+        sa.Column("core_memories", postgresql.JSONB(), nullable=True),
+    )
+    op.create_index("ix_personalities_hobbies", "personalities", ["hobbies"], postgresql_using="gin")
+    op.create_index("ix_personalities_directives", "personalities", ["directives"], postgresql_using="gin")
+
+    op.create_table(
+        "memories",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("personality_id", sa.Integer(), sa.ForeignKey("personalities.id", ondelete="CASCADE")),
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("meta_data", postgresql.JSONB(), nullable=True),
+    )
+
+    op.create_table(
+        "posts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("author_id", sa.Integer(), sa.ForeignKey("authors.id", ondelete="CASCADE")),
+    )
+    op.create_index("ix_posts_id", "posts", ["id"])
+
+    op.create_table(
+        "comments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("post_id", sa.Integer(), sa.ForeignKey("posts.id", ondelete="CASCADE")),
+        sa.Column("author_id", sa.Integer(), sa.ForeignKey("authors.id", ondelete="CASCADE")),
+    )
+    op.create_index("ix_comments_id", "comments", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("comments")
+    op.drop_table("posts")
+    op.drop_table("memories")
+    op.drop_table("personalities")
+    op.drop_table("authors")
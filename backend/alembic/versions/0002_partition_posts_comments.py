@@ -0,0 +1,163 @@
+"""partition posts and comments by month
+
+Optional branch, applied with `alembic upgrade partitioning@head` or together
+with the main line by `alembic upgrade heads` (see alembic/README). Converts
+`posts` and `comments` into tables range-partitioned on `timestamp` with one
+partition per month and a default partition. Postgres cannot enforce a
+foreign key to a partitioned table without the partition key, so
+`comments.post_id -> posts.id` is dropped and deletion cascades through the
+ORM relationship instead.
+
+Revision ID: 0002_partition_posts_comments
+Revises: 0001_initial_schema
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_partition_posts_comments"
+down_revision: Union[str, None] = "0001_initial_schema"
+branch_labels: Union[str, Sequence[str], None] = ("partitioning",)
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+COLUMNS = {
+    "posts": (
+        "id integer NOT NULL DEFAULT nextval('posts_id_seq'::regclass), "
+        "content text NOT NULL, "
+        "timestamp timestamptz NOT NULL DEFAULT now(), "
+        "author_id integer REFERENCES authors(id) ON DELETE CASCADE"
+    ),
+    "comments": (
+        "id integer NOT NULL DEFAULT nextval('comments_id_seq'::regclass), "
+        "content text NOT NULL, "
+        "timestamp timestamptz NOT NULL DEFAULT now(), "
+        "post_id integer, "
+        "author_id integer REFERENCES authors(id) ON DELETE CASCADE"
+    ),
+}
+
+COPY_COLUMNS = {
+    "posts": ("id, content, timestamp, author_id", "id, content, COALESCE(timestamp, now()), author_id"),
+    "comments": (
+        "id, content, timestamp, post_id, author_id",
+        "id, content, COALESCE(timestamp, now()), post_id, author_id",
+    ),
+}
+
+
+# Indexes of later revisions on the main line, rebuilt when this branch runs after them
+FEED_INDEXES = {
+    "posts": {"ix_posts_timestamp": "(timestamp)"},
+    "comments": {"ix_comments_post_id_timestamp": "(post_id, timestamp)"},
+}
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _create_monthly_partitions(table: str, start: date, end: date) -> None:
+    month = start
+    while month <= end:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS {table}_y{month.year}m{month.month:02d} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{upper.isoformat()} 00:00:00+00')"
+        )
+        month = upper
+    op.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+
+
+def _carry_extra_columns(table: str, old: str) -> str:
+    """
+    Add columns of `old` that `COLUMNS` does not define, e.g. `duplicate_of` when a later
+    revision ran before this branch, and return them for the copy column lists.
+    """
+    extra = op.get_bind().execute(sa.text(
+        "SELECT attname, format_type(atttypid, atttypmod) FROM pg_attribute "
+        "WHERE attrelid = CAST(:old AS regclass) AND attnum > 0 AND NOT attisdropped "
+        "AND attname NOT IN (SELECT attname FROM pg_attribute WHERE attrelid = CAST(:new AS regclass)) "
+        "ORDER BY attnum"
+    ), {"old": old, "new": table}).fetchall()
+    for name, column_type in extra:
+        op.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+    return "".join(f", {name}" for name, _ in extra)
+
+
+def _feed_indexes(old: str) -> set:
+    return {row[0] for row in op.get_bind().execute(
+        sa.text("SELECT indexname FROM pg_indexes WHERE tablename = :old"), {"old": old}
+    )}
+
+
+def _recreate_feed_indexes(table: str, existing: set) -> None:
+    for name, columns in FEED_INDEXES[table].items():
+        if name in existing:
+            op.execute(f"CREATE INDEX {name} ON {table} {columns}")
+
+
+def _partition(table: str) -> None:
+    old = f"{table}_unpartitioned"
+    op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+    op.execute(f"ALTER INDEX IF EXISTS ix_{table}_id RENAME TO ix_{old}_id")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+
+    op.execute(f"CREATE TABLE {table} ({COLUMNS[table]}, PRIMARY KEY (id, timestamp)) PARTITION BY RANGE (timestamp)")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.execute(f"CREATE INDEX ix_{table}_id ON {table} (id)")
+
+    oldest = op.get_bind().execute(sa.text(f"SELECT min(timestamp) FROM {old}")).scalar()
+    today = datetime.now(timezone.utc).date().replace(day=1)
+    start = oldest.astimezone(timezone.utc).date().replace(day=1) if oldest else today
+    _create_monthly_partitions(table, min(start, today), _add_months(today, MONTHS_AHEAD))
+
+    target, source = COPY_COLUMNS[table]
+    extra = _carry_extra_columns(table, old)
+    op.execute(f"INSERT INTO {table} ({target}{extra}) SELECT {source}{extra} FROM {old}")
+    indexes = _feed_indexes(old)
+    op.execute(f"DROP TABLE {old}")
+    _recreate_feed_indexes(table, indexes)
+
+
+def _unpartition(table: str) -> None:
+    old = f"{table}_partitioned"
+    op.execute(f"ALTER TABLE {table} RENAME TO {old}")
+    op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+    op.execute(f"ALTER INDEX IF EXISTS ix_{table}_id RENAME TO ix_{old}_id")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+
+    op.execute(f"CREATE TABLE {table} ({COLUMNS[table]}, CONSTRAINT {table}_pkey PRIMARY KEY (id))")
+    op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    op.execute(f"CREATE INDEX ix_{table}_id ON {table} (id)")
+
+    columns, _ = COPY_COLUMNS[table]
+    columns += _carry_extra_columns(table, old)
+    op.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {old}")
+    indexes = _feed_indexes(old)
+    op.execute(f"DROP TABLE {old}")
+    _recreate_feed_indexes(table, indexes)
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE comments DROP CONSTRAINT IF EXISTS comments_post_id_fkey")
+    _partition("posts")
+    _partition("comments")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_posts_timestamp ON posts (timestamp)")
+
+
+def downgrade() -> None:
+    _unpartition("comments")
+    _unpartition("posts")
+    op.execute(
+        "ALTER TABLE comments ADD CONSTRAINT comments_post_id_fkey "
+        "FOREIGN KEY (post_id) REFERENCES posts(id) ON DELETE CASCADE"
+    )
@@ -0,0 +1,33 @@
+"""index posts.timestamp and comments(post_id, timestamp)
+
+Every feed query sorts posts by timestamp and `get_comments_by_post`
+filters comments by post and sorts them by timestamp. Uses IF NOT EXISTS
+because the partitioning branch already creates the posts index.
+
+Labelled `main`, so `alembic upgrade main@head` migrates without the
+optional partitioning branch that also forks from 0001.
+
+Revision ID: 0003_feed_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_feed_indexes"
+down_revision: Union[str, None] = "0001_initial_schema"
+branch_labels: Union[str, Sequence[str], None] = ("main",)
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS ix_posts_timestamp ON posts (timestamp)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_comments_post_id_timestamp ON comments (post_id, timestamp)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_comments_post_id_timestamp")
+    op.execute("DROP INDEX IF EXISTS ix_posts_timestamp")
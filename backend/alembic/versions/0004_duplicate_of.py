@@ -0,0 +1,32 @@
+"""add duplicate_of to posts and comments
+
+Near-duplicate detection in flag mode stores the ID of the earlier post or
+comment that new content repeats. There is no foreign key: the original may
+be deleted or archived, and the column is only informational.
+
+Revision ID: 0004_duplicate_of
+Revises: 0003_feed_indexes
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_duplicate_of"
+down_revision: Union[str, None] = "0003_feed_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # On partitioned tables the column is added to every partition as well
+    op.add_column("posts", sa.Column("duplicate_of", sa.Integer(), nullable=True))
+    op.add_column("comments", sa.Column("duplicate_of", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("comments", "duplicate_of")
+    op.drop_column("posts", "duplicate_of")
@@ -1,22 +1,40 @@
 import logging
-from typing import Type
+from datetime import datetime
+from typing import Optional, Type
 
 from sqlalchemy import func, desc
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, joinedload
 
+from . import dedup
 from .models import Post, Author, Comment, Personalities
 from .schemas import PostCreate, AuthorCreate, PersonalityCreate
 
 
 # Posts
-def get_posts(db: Session, count_only: bool = False, skip: int = 0, limit: int = 10) -> list[Type[Post]]:
-    """Retrieve a list of posts with pagination."""
+def get_posts(
+        db: Session,
+        count_only: bool = False,
+        skip: int = 0,
+        limit: int = 10,
+        before: Optional[datetime] = None,
+        after_id: Optional[int] = None,
+) -> list[Type[Post]]:
+    """
+    Retrieve a list of posts with pagination.
+    Passing `before` (keyset pagination) lets partitioned tables skip partitions newer than it.
+    Passing `after_id` returns only posts created after that one, oldest first, for incremental sync.
+    """
     try:
+        query = db.query(func.count(Post.id)) if count_only else db.query(Post)
+        if before is not None:
+            query = query.filter(Post.timestamp < before)
         if count_only:
-            return db.query(func.count(Post.id)).scalar()
+            return query.scalar()
+        if after_id is not None:
+            return query.filter(Post.id > after_id).order_by(Post.id).limit(limit).all()
         return (
-            db.query(Post)
+            query
             .order_by(desc(Post.timestamp))
             .offset(skip)
             .limit(limit)
@@ -26,14 +44,27 @@ def get_posts(db: Session, count_only: bool = False, skip: int = 0, limit: int =
         raise ValueError(f"Database error: {str(e)}")
 
 
+def get_posts_by_ids(db: Session, post_ids: list[int]) -> list[Type[Post]]:
+    """Retrieve posts by ID, preserving the order of the given IDs."""
+    try:
+        if not post_ids:
+            return []
+        posts = {post.id: post for post in db.query(Post).filter(Post.id.in_(post_ids)).all()}
+        return [posts[post_id] for post_id in post_ids if post_id in posts]
+    except SQLAlchemyError as e:
+        raise ValueError(f"Database error: {str(e)}")
+
+
 def create_post(db: Session, post: PostCreate):
-    """Create a new post."""
+    """Create a new post, flagging or rejecting it when it near-duplicates a recent one."""
     try:
         get_author_by_id(db, post.author_id)
-        db_post = Post(content=post.content, author_id=post.author_id)
+        fingerprint, duplicate_of = dedup.check("post", post.content)
+        db_post = Post(content=post.content, author_id=post.author_id, duplicate_of=duplicate_of)
         db.add(db_post)
         db.commit()
         db.refresh(db_post)
+        dedup.record("post", db_post.id, fingerprint)
         return db_post
     except SQLAlchemyError as e:
         db.rollback()
@@ -190,7 +221,7 @@ def delete_personality(db: Session, author_id: int) -> bool:
 
 # Comments
 def create_comment(db: Session, post_id: int, author_id: int, content: str) -> Comment:
-    """Create a new comment."""
+    """Create a new comment, flagging or rejecting it when it near-duplicates a recent one."""
     try:
         post = db.query(Post).filter(Post.id == post_id).first()
         if not post:
@@ -200,10 +231,12 @@ def create_comment(db: Session, post_id: int, author_id: int, content: str) -> C
         if not author:
             raise ValueError(f"Author with ID {author_id} does not exist.")
 
-        comment = Comment(content=content, post_id=post_id, author_id=author_id)
+        fingerprint, duplicate_of = dedup.check("comment", content)
+        comment = Comment(content=content, post_id=post_id, author_id=author_id, duplicate_of=duplicate_of)
         db.add(comment)
         db.commit()
         db.refresh(comment)
+        dedup.record("comment", comment.id, fingerprint)
         return comment
     except SQLAlchemyError as e:
         db.rollback()
@@ -224,8 +257,8 @@ def get_comments_by_post(db: Session, post_id: int):
         raise ValueError(f"Database error: {str(e)}")
 
 
-def delete_comment(db: Session, post_id: int, comment_id: int) -> bool:
-    """Delete a comment by its ID and post ID."""
+def delete_comment(db: Session, post_id: int, comment_id: int) -> Comment:
+    """Delete a comment by its ID and post ID and return it, e.g. for its timestamp."""
     try:
         comment = (
             db.query(Comment)
@@ -236,7 +269,7 @@ def delete_comment(db: Session, post_id: int, comment_id: int) -> bool:
             raise ValueError(f"Comment with ID {comment_id} on Post {post_id} does not exist.")
         db.delete(comment)
         db.commit()
-        return True
+        return comment
     except SQLAlchemyError as e:
         db.rollback()
         raise ValueError(f"Database error: {str(e)}")
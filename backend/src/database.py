@@ -1,11 +1,71 @@
+import logging
+import os
+import threading
+import time
+
 from redis import Redis
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-DATABASE_URL = "postgresql://user:password@db:5432/mydatabase"
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://user:password@db:5432/mydatabase")
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-redis_client = Redis(host="redis", port=6379, decode_responses=True)
+# Optional read replica used by GET endpoints. Reads fall back to the primary when it is unset.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+# An unreachable replica must fail fast, since health probes run inside GET requests
+REPLICA_CONNECT_TIMEOUT_SECONDS = int(os.getenv("REPLICA_CONNECT_TIMEOUT_SECONDS", "2"))
+read_engine = None
+if READ_DATABASE_URL:
+    read_connect_args = {"connect_timeout": REPLICA_CONNECT_TIMEOUT_SECONDS} if READ_DATABASE_URL.startswith("postgresql") else {}
+    read_engine = create_engine(READ_DATABASE_URL, connect_args=read_connect_args)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine) if read_engine else None
+
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_INTERVAL_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL_SECONDS", "2"))
+_replica_health = {"checked_at": 0.0, "healthy": False}
+_replica_probe_lock = threading.Lock()
+
+redis_client = Redis(host=os.getenv("REDIS_HOST", "redis"), port=6379, decode_responses=True)
+
+
+def _replica_lag_seconds() -> float:
+    with read_engine.connect() as connection:
+        if read_engine.dialect.name != "postgresql":
+            connection.execute(text("SELECT 1"))
+            return 0.0
+        lag = connection.execute(text(
+            "SELECT CASE WHEN NOT pg_is_in_recovery() "
+            "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+        )).scalar()
+        return float(lag or 0.0)
+
+
+def replica_available() -> bool:
+    """
+    Whether reads can go to the replica: configured, reachable and not lagging. Cached briefly;
+    one request probes while concurrent ones keep using the previous result.
+    """
+    if read_engine is None:
+        return False
+    now = time.monotonic()
+    if now - _replica_health["checked_at"] < REPLICA_LAG_CHECK_INTERVAL_SECONDS:
+        return _replica_health["healthy"]
+    if not _replica_probe_lock.acquire(blocking=False):
+        return _replica_health["healthy"]
+    try:
+        _replica_health["checked_at"] = now
+        lag = _replica_lag_seconds()
+        healthy = lag <= REPLICA_MAX_LAG_SECONDS
+        if not healthy:
+            logging.warning(f"Read replica is lagging by {lag:.1f}s, routing reads to the primary.")
+    except Exception as e:
+        logging.error(f"Read replica is unavailable, routing reads to the primary: {e}")
+        healthy = False
+    finally:
+        _replica_probe_lock.release()
+    _replica_health["healthy"] = healthy
+    return healthy
@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import os
+import random
+import re
+import time
+from typing import Optional
+
+from .database import redis_client
+
+# off: no checks, flag: store the post or comment with `duplicate_of` set, reject: refuse it with a 409
+DEDUP_MODE = os.getenv("DEDUP_MODE", "flag")
+# Share of distinct words two texts must have in common (estimated Jaccard similarity) to count as duplicates
+DEDUP_MIN_SIMILARITY = float(os.getenv("DEDUP_MIN_SIMILARITY", "0.7"))
+DEDUP_MIN_WORDS = int(os.getenv("DEDUP_MIN_WORDS", "8"))
+DEDUP_BUCKET_SIZE = int(os.getenv("DEDUP_BUCKET_SIZE", "200"))
+DEDUP_WINDOW_SECONDS = int(os.getenv("DEDUP_WINDOW_SECONDS", str(7 * 24 * 3600)))
+
+DEDUP_PREFIX = "dedup"
+# 64 MinHash values in 16 bands of 4: texts with similarity 0.7 share a band with probability
+# 0.99, unrelated ones (similarity 0.2) with probability 0.03, so buckets stay small
+PERMUTATIONS = 64
+BANDS = 16
+ROWS = PERMUTATIONS // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+_random = random.Random(42)
+HASH_PARAMS = [(_random.randrange(1, MERSENNE_PRIME), _random.randrange(MERSENNE_PRIME)) for _ in range(PERMUTATIONS)]
+WORD = re.compile(r"\w+")
+
+
+class DuplicateContentError(ValueError):
+    def __init__(self, kind: str, duplicate_of: int):
+        super().__init__(f"Content is a near-duplicate of {kind} {duplicate_of}.")
+        self.kind = kind
+        self.duplicate_of = duplicate_of
+
+
+def fingerprint(text: str) -> Optional[str]:
+    """
+    MinHash signature of the text's distinct words, as PERMUTATIONS 32-bit hex values; None for
+    texts too short to compare reliably. The share of equal values estimates the Jaccard similarity
+    of the word sets, so one changed word in a short text moves it as much as in a long one.
+    """
+    words = WORD.findall(text.lower())
+    if len(words) < DEDUP_MIN_WORDS:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "big") for word in set(words)]
+    return "".join(
+        f"{min((a * value + b) % MERSENNE_PRIME for value in hashes) & 0xFFFFFFFF:08x}" for a, b in HASH_PARAMS
+    )
+
+
+def similarity(first: str, second: str) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(first[i:i + 8] == second[i:i + 8] for i in range(0, len(first), 8)) / PERMUTATIONS
+
+
+def _band_keys(kind: str, value: str) -> list[str]:
+    width = ROWS * 8
+    keys = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(value[band * width:(band + 1) * width].encode(), digest_size=8).hexdigest()
+        keys.append(f"{DEDUP_PREFIX}:{kind}:band:{band}:{digest}")
+    return keys
+
+
+def _fingerprint_key(kind: str, item_id) -> str:
+    return f"{DEDUP_PREFIX}:{kind}:fp:{item_id}"
+
+
+def find_duplicate(kind: str, value: str) -> Optional[int]:
+    """
+    ID of the most similar indexed item at or above DEDUP_MIN_SIMILARITY. Only items sharing a
+    band are compared; a band holds 4 hash values, so its buckets only collect similar texts and
+    a lookup reads a few candidates however large the index grows.
+    """
+    pipe = redis_client.pipeline()
+    for key in _band_keys(kind, value):
+        pipe.zrange(key, 0, -1)
+    candidates = sorted({int(item_id) for bucket in pipe.execute() for item_id in bucket})
+    if not candidates:
+        return None
+    stored = redis_client.mget([_fingerprint_key(kind, item_id) for item_id in candidates])
+    best = None
+    for item_id, candidate in zip(candidates, stored):
+        if candidate is None:
+            continue
+        score = similarity(value, candidate)
+        if score >= DEDUP_MIN_SIMILARITY and (best is None or score > best[0]):
+            best = (score, item_id)
+    return best[1] if best else None
+
+
+def check(kind: str, content: str) -> tuple[Optional[str], Optional[int]]:
+    """
+    Fingerprint `content` and look it up. Returns the fingerprint and the ID of the item it
+    duplicates, or raises DuplicateContentError in reject mode. Redis errors let content through.
+    """
+    if DEDUP_MODE == "off":
+        return None, None
+    value = fingerprint(content)
+    if value is None:
+        return None, None
+    try:
+        duplicate_of = find_duplicate(kind, value)
+    except Exception as e:
+        logging.error(f"Error checking {kind} for near-duplicates: {e}")
+        return value, None
+    if duplicate_of is not None and DEDUP_MODE == "reject":
+        raise DuplicateContentError(kind, duplicate_of)
+    return value, duplicate_of
+
+
+def record(kind: str, item_id: int, value: Optional[str]):
+    """
+    Index a stored item's fingerprint. Buckets expire with the window; the size cap only
+    trims buckets filled by many copies of the same text, since only similar texts share one.
+    """
+    if value is None:
+        return
+    try:
+        pipe = redis_client.pipeline()
+        pipe.set(_fingerprint_key(kind, item_id), value, ex=DEDUP_WINDOW_SECONDS)
+        for key in _band_keys(kind, value):
+            pipe.zadd(key, {str(item_id): time.time()})
+            pipe.zremrangebyrank(key, 0, -DEDUP_BUCKET_SIZE - 1)
+            pipe.expire(key, DEDUP_WINDOW_SECONDS)
+        pipe.execute()
+    except Exception as e:
+        logging.error(f"Error indexing {kind} {item_id} for near-duplicates: {e}")
+
+
+def clear_index():
+    """Drop every fingerprint, e.g. after the schema was reset and IDs start over."""
+    keys = list(redis_client.scan_iter(f"{DEDUP_PREFIX}:*", count=1000))
+    for start in range(0, len(keys), 1000):
+        redis_client.delete(*keys[start:start + 1000])
+    logging.info(f"Cleared {len(keys)} near-duplicate index keys.")
+
+
+def forget(kind: str, *item_ids: int):
+    """Unindex deleted items; their band entries are skipped once the fingerprint is gone."""
+    if not item_ids:
+        return
+    try:
+        redis_client.delete(*(_fingerprint_key(kind, item_id) for item_id in item_ids))
+    except Exception as e:
+        logging.error(f"Error removing {kind} {list(item_ids)} from the near-duplicate index: {e}")
@@ -1,14 +1,21 @@
+import asyncio
 import logging
+import math
+import os
+import time
 from contextlib import asynccontextmanager
-from typing import List
+from datetime import datetime
+from typing import List, Optional
+from urllib.parse import urlencode
 
-from fastapi import FastAPI, Depends, Query, HTTPException
+from fastapi import FastAPI, Depends, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
 
 from .crud import (
     get_posts,
+    get_posts_by_ids,
     create_post,
     get_authors,
     create_author,
@@ -17,7 +24,7 @@ from .crud import (
     get_comments_by_post,
     delete_comment, update_personality, delete_personality, create_personality, get_personality_by_author_id,
 )
-from .database import SessionLocal, engine
+from .database import SessionLocal, ReadSessionLocal, engine, replica_available
 from .models import Base, Author, Personalities
 from .schemas import (
     Post,
@@ -28,10 +35,18 @@ from .schemas import (
     CommentCreate,
     CommentSchema, Personality, PersonalityCreate,
 )
+from .partitions import maintain_partitions
 from .subscriptions import publish_new_post
+from . import dedup, trending
 
 logging.basicConfig(level=logging.INFO)
 
+LAST_WRITE_COOKIE = "last_write"
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+# Set to "false" when the schema is managed with Alembic, e.g. with partitioned posts and comments.
+RESET_SCHEMA_ON_STARTUP = os.getenv("RESET_SCHEMA_ON_STARTUP", "true").lower() == "true"
+PARTITION_MAINTENANCE_INTERVAL_SECONDS = int(os.getenv("PARTITION_MAINTENANCE_INTERVAL_SECONDS", "21600"))
+
 
 def drop_all_tables():
     with engine.connect() as connection:
@@ -47,20 +62,58 @@ def drop_all_tables():
             logging.error(f"Error while dropping tables: {e}")
 
 
+async def run_periodically(interval: float, job, run_first: bool = False):
+    if not run_first:
+        await asyncio.sleep(interval)
+    while True:
+        try:
+            await asyncio.to_thread(job)
+        except Exception as e:
+            logging.error(f"Error running periodic job {job.__name__}: {e}")
+        await asyncio.sleep(interval)
+
+
+def reset_trending():
+    db = SessionLocal()
+    try:
+        trending.rebuild_trending(db)
+    except Exception as e:
+        logging.error(f"Error rebuilding trending feed: {e}")
+    finally:
+        db.close()
+
+
+def reset_dedup():
+    try:
+        dedup.clear_index()
+    except Exception as e:
+        logging.error(f"Error clearing the near-duplicate index: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Application lifespan event handler for startup and shutdown.
     """
+    tasks = []
     try:
-        logging.info("Dropping and creating database schema...")
-        drop_all_tables()
-        Base.metadata.drop_all(bind=engine)
-        Base.metadata.create_all(bind=engine)
+        if RESET_SCHEMA_ON_STARTUP:
+            logging.info("Dropping and creating database schema...")
+            drop_all_tables()
+            Base.metadata.drop_all(bind=engine)
+            Base.metadata.create_all(bind=engine)
         ensure_default_author()
+        if RESET_SCHEMA_ON_STARTUP:
+            reset_dedup()
+        reset_trending()
+        tasks.append(asyncio.create_task(
+            run_periodically(PARTITION_MAINTENANCE_INTERVAL_SECONDS, maintain_partitions, run_first=True)
+        ))
         logging.info("Application started.")
         yield
     finally:
+        for task in tasks:
+            task.cancel()
         logging.info("Application shutdown.")
 
 
@@ -68,7 +121,9 @@ app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    # With credentials allowed, "*" makes Starlette echo the caller's origin, which browsers
+    # require before they store or send the read-your-writes cookie; set explicit origins in production
+    allow_origins=os.getenv("CORS_ALLOW_ORIGINS", "*").split(","),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -107,6 +162,23 @@ def ensure_default_author():
         db.close()
 
 
+@app.middleware("http")
+async def mark_recent_writes(request: Request, call_next):
+    """Remember successful writes in a cookie so the same client reads its own writes from the primary."""
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        response.set_cookie(LAST_WRITE_COOKIE, str(time.time()), max_age=math.ceil(READ_YOUR_WRITES_SECONDS))
+    return response
+
+
+def wrote_recently(request: Request) -> bool:
+    try:
+        last_write = float(request.cookies.get(LAST_WRITE_COOKIE, 0))
+    except ValueError:
+        return False
+    return time.time() - last_write < READ_YOUR_WRITES_SECONDS
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -115,16 +187,44 @@ def get_db():
         db.close()
 
 
+def get_read_db(request: Request):
+    """Session for read-only routes: the replica when it is healthy, the primary otherwise."""
+    if ReadSessionLocal is None or wrote_recently(request) or not replica_available():
+        yield from get_db()
+        return
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 @app.get("/posts", response_model=PaginatedResponse[Post], tags=["posts"])
 def list_posts(
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
+        before: Optional[datetime] = Query(None, description="Only return posts older than this timestamp"),
+        after_id: Optional[int] = Query(None, ge=0, description="Only return posts newer than this ID, oldest first"),
 ):
-    total_posts = get_posts(db, count_only=True)
-    posts = get_posts(db, skip=skip, limit=limit)
-    next_url = f"/posts?skip={skip + limit}&limit={limit}" if skip + limit < total_posts else None
-    previous_url = f"/posts?skip={max(skip - limit, 0)}&limit={limit}" if skip > 0 else None
+    posts = get_posts(db, skip=skip, limit=limit, before=before, after_id=after_id)
+    previous_url = None
+    if after_id is not None:
+        # Incremental sync polls this path constantly, so it skips the full-table count
+        total_posts = None
+        next_url = f"/posts?after_id={posts[-1].id}&limit={limit}" if len(posts) == limit else None
+    elif before is not None:
+        # Keyset pages continue from the oldest post returned and skip the count, which would
+        # read every older row and partition
+        total_posts = None
+        next_url = (
+            f"/posts?{urlencode({'before': posts[-1].timestamp.isoformat(), 'limit': limit})}"
+            if len(posts) == limit else None
+        )
+    else:
+        total_posts = get_posts(db, count_only=True)
+        next_url = f"/posts?skip={skip + limit}&limit={limit}" if skip + limit < total_posts else None
+        previous_url = f"/posts?skip={max(skip - limit, 0)}&limit={limit}" if skip > 0 else None
 
     return PaginatedResponse(
         count=total_posts,
@@ -139,9 +239,12 @@ def add_post(post: PostCreate, db: Session = Depends(get_db)):
     try:
         new_post = create_post(db, post)
         publish_new_post(new_post.id)
+        trending.record_post(new_post.id)
         return new_post
     except HTTPException as e:
         raise e
+    except dedup.DuplicateContentError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logging.error(str(e))
         raise HTTPException(
@@ -150,6 +253,34 @@ def add_post(post: PostCreate, db: Session = Depends(get_db)):
         )
 
 
+@app.get("/feed/trending", response_model=PaginatedResponse[Post], tags=["posts"])
+def list_trending_posts(
+        db: Session = Depends(get_read_db),
+        skip: int = Query(0, ge=0),
+        limit: int = Query(10, ge=1, le=100),
+):
+    """
+    Retrieve posts ranked by recency and comment activity.
+    """
+    try:
+        total_posts, post_ids = trending.get_trending_ids(db, skip=skip, limit=limit)
+        posts = get_posts_by_ids(db, post_ids)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"An unexpected error occurred: {str(e)}",
+        )
+    next_url = f"/feed/trending?skip={skip + limit}&limit={limit}" if skip + limit < total_posts else None
+    previous_url = f"/feed/trending?skip={max(skip - limit, 0)}&limit={limit}" if skip > 0 else None
+
+    return PaginatedResponse(
+        count=total_posts,
+        next=next_url,
+        previous=previous_url,
+        results=posts,
+    )
+
+
 @app.delete("/posts/{post_id}", status_code=204, tags=["posts"])
 def remove_post(post_id: int, db: Session = Depends(get_db)):
     """
@@ -157,8 +288,13 @@ def remove_post(post_id: int, db: Session = Depends(get_db)):
     Returns a 204 No Content status if successful.
     """
     try:
+        # Comments are deleted with the post, so their fingerprints go too
+        comment_ids = [comment.id for comment in get_comments_by_post(db, post_id)]
         success = delete_post(db, post_id)
         if success:
+            trending.remove_post(post_id)
+            dedup.forget("post", post_id)
+            dedup.forget("comment", *comment_ids)
             return
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -171,7 +307,7 @@ def remove_post(post_id: int, db: Session = Depends(get_db)):
 
 @app.get("/authors", response_model=PaginatedResponse[AuthorBase], tags=["authors"])
 def list_authors(
-        db: Session = Depends(get_db),
+        db: Session = Depends(get_read_db),
         skip: int = Query(0, ge=0),
         limit: int = Query(10, ge=1, le=100),
 ):
@@ -195,7 +331,7 @@ def list_authors(
 
 
 @app.get("/authors/{author_id}", response_model=AuthorBase, tags=["authors"])
-def get_author(author_id: int, db: Session = Depends(get_db)):
+def get_author(author_id: int, db: Session = Depends(get_read_db)):
     try:
         author = db.query(Author).filter(Author.id == author_id).first()
         if not author:
@@ -225,7 +361,11 @@ def add_comment(post_id: int, comment: CommentCreate, db: Session = Depends(get_
     Add a comment to a specific post.
     """
     try:
-        return create_comment(db, post_id, comment.author_id, comment.content)
+        new_comment = create_comment(db, post_id, comment.author_id, comment.content)
+        trending.record_comment(post_id)
+        return new_comment
+    except dedup.DuplicateContentError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -236,7 +376,7 @@ def add_comment(post_id: int, comment: CommentCreate, db: Session = Depends(get_
 
 
 @app.get("/posts/{post_id}/comments", response_model=List[CommentSchema], tags=["comments"])
-def list_comments(post_id: int, db: Session = Depends(get_db)):
+def list_comments(post_id: int, db: Session = Depends(get_read_db)):
     """
     Retrieve all comments for a specific post.
     """
@@ -255,8 +395,10 @@ def remove_comment(post_id: int, comment_id: int, db: Session = Depends(get_db))
     Delete a specific comment associated with a specific post.
     """
     try:
-        success = delete_comment(db, post_id, comment_id)
-        if success:
+        comment = delete_comment(db, post_id, comment_id)
+        if comment:
+            trending.record_comment_removed(post_id, comment.timestamp)
+            dedup.forget("comment", comment_id)
             return
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -268,7 +410,7 @@ def remove_comment(post_id: int, comment_id: int, db: Session = Depends(get_db))
 
 
 @app.get("/personalities/{author_id}", response_model=Personality, tags=["personalities"])
-def get_personality(author_id: int, db: Session = Depends(get_db)):
+def get_personality(author_id: int, db: Session = Depends(get_read_db)):
     """
     Retrieve a personality by the associated author ID.
     """
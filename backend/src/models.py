@@ -70,8 +70,10 @@ class Post(Base):
     __tablename__ = "posts"
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     author_id = Column(Integer, ForeignKey("authors.id", ondelete="CASCADE"))
+    # Earlier post this one near-duplicates, set when DEDUP_MODE is "flag"
+    duplicate_of = Column(Integer, nullable=True)
 
     # Relationships
     author = relationship("Author", back_populates="posts")
@@ -89,7 +91,14 @@ class Comment(Base):
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"))
     author_id = Column(Integer, ForeignKey("authors.id", ondelete="CASCADE"))
+    # Earlier comment this one near-duplicates, set when DEDUP_MODE is "flag"
+    duplicate_of = Column(Integer, nullable=True)
 
     # Relationships
     post = relationship("Post", back_populates="comments")
     author = relationship("Author", back_populates="comments")
+
+    # Serves get_comments_by_post: filter by post, ordered by timestamp
+    __table_args__ = (
+        Index('ix_comments_post_id_timestamp', post_id, timestamp),
+    )
@@ -0,0 +1,110 @@
+import argparse
+import logging
+import os
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from .database import engine
+
+PARTITIONED_TABLES = ("posts", "comments")
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "0"))
+ARCHIVE_SCHEMA = os.getenv("ARCHIVE_SCHEMA", "archive")
+ARCHIVE_TABLESPACE = os.getenv("ARCHIVE_TABLESPACE")
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(connection: Connection, table: str) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(connection.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+        {"table": table},
+    ).scalar())
+
+
+def _attached_months(connection: Connection, table: str) -> list[date]:
+    names = connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table)"
+        ),
+        {"table": table},
+    ).scalars()
+    months = []
+    for name in names:
+        suffix = name[len(table) + 2:]
+        if name.startswith(f"{table}_y") and len(suffix) == 7 and suffix[4] == "m":
+            months.append(date(int(suffix[:4]), int(suffix[5:]), 1))
+    return sorted(months)
+
+
+def ensure_partitions(connection: Connection, table: str, months_ahead: int = PARTITION_MONTHS_AHEAD) -> int:
+    """Create monthly partitions up to `months_ahead` months from now so new rows never land in the default one."""
+    this_month = datetime.now(timezone.utc).date().replace(day=1)
+    existing = set(_attached_months(connection, table))
+    created = 0
+    for offset in range(months_ahead + 1):
+        month = _add_months(this_month, offset)
+        if month in existing:
+            continue
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {_partition_name(table, month)} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{_add_months(month, 1).isoformat()} 00:00:00+00')"
+        ))
+        created += 1
+    return created
+
+
+def archive_partitions(connection: Connection, table: str, older_than_months: int) -> list[str]:
+    """
+    Detach monthly partitions that ended more than `older_than_months` ago and move them
+    to the archive schema, and to ARCHIVE_TABLESPACE (e.g. on compressed storage) when set.
+    """
+    cutoff = _add_months(datetime.now(timezone.utc).date().replace(day=1), -older_than_months)
+    connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+    archived = []
+    for month in _attached_months(connection, table):
+        if _add_months(month, 1) > cutoff:
+            break
+        name = _partition_name(table, month)
+        connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        if ARCHIVE_TABLESPACE:
+            connection.execute(text(f"ALTER TABLE {ARCHIVE_SCHEMA}.{name} SET TABLESPACE {ARCHIVE_TABLESPACE}"))
+        archived.append(f"{ARCHIVE_SCHEMA}.{name}")
+    return archived
+
+
+def maintain_partitions(archive_after_months: int = ARCHIVE_AFTER_MONTHS):
+    """Create upcoming partitions and archive old ones. A no-op when the tables are not partitioned."""
+    with engine.begin() as connection:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(connection, table):
+                continue
+            created = ensure_partitions(connection, table)
+            if created:
+                logging.info(f"Created {created} partitions for {table}.")
+            if archive_after_months > 0:
+                for name in archive_partitions(connection, table, archive_after_months):
+                    logging.info(f"Archived partition {name}.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Create upcoming partitions and archive old ones.")
+    parser.add_argument("--archive-after-months", type=int, default=ARCHIVE_AFTER_MONTHS)
+    args = parser.parse_args()
+    maintain_partitions(args.archive_after_months)
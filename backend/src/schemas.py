@@ -75,6 +75,7 @@ class Post(PostBase):
     id: int
     timestamp: datetime
     author: AuthorBase
+    duplicate_of: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -91,6 +92,7 @@ class CommentSchema(CommentCreate):
     timestamp: datetime
     author: AuthorBase
     post_id: int
+    duplicate_of: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -98,7 +100,8 @@ class CommentSchema(CommentCreate):
 
 # Paginated Response Schema
 class PaginatedResponse(BaseModel, Generic[T]):
-    count: int
+    # None when the endpoint skips counting, e.g. keyset and incremental-sync pages of GET /posts
+    count: Optional[int]
     next: Optional[str]
     previous: Optional[str]
     results: List[T]
@@ -1,5 +1,11 @@
+import logging
+
 from .database import redis_client
 
 
 def publish_new_post(post_id: int):
-    redis_client.publish("new_post", f"Post {post_id} added!")
+    # The post is already committed; a missing Redis only costs subscribers the notification
+    try:
+        redis_client.publish("new_post", f"Post {post_id} added!")
+    except Exception as e:
+        logging.error(f"Error publishing new post {post_id}: {e}")
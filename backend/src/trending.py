@@ -0,0 +1,164 @@
+import logging
+import math
+import os
+import time
+from datetime import datetime, timezone, timedelta
+
+from sqlalchemy.orm import Session
+
+from .database import redis_client
+from .models import Post, Comment
+
+TRENDING_KEY = "trending_posts"
+TRENDING_EPOCH_KEY = "trending_posts:epoch"
+TRENDING_MAX_POSTS = int(os.getenv("TRENDING_MAX_POSTS", "1000"))
+TRENDING_WINDOW_HOURS = int(os.getenv("TRENDING_WINDOW_HOURS", "72"))
+TRENDING_HALF_LIFE_SECONDS = int(os.getenv("TRENDING_HALF_LIFE_SECONDS", "21600"))
+
+POST_WEIGHT = 10.0
+COMMENT_WEIGHT = 3.0
+MIN_SCORE = 0.01
+# Scores are stored as weight * 2 ** ((t - epoch) / half-life) for an event at time t, so their
+# order is the order of the decayed scores at any moment and nothing rewrites the set on a timer.
+# They grow with the age of the epoch, which moves forward once it is this many half-lives old.
+REBASE_HALF_LIVES = 32
+
+
+def _decay_factor(seconds: float) -> float:
+    return math.pow(0.5, seconds / TRENDING_HALF_LIFE_SECONDS)
+
+
+def _growth(epoch: float, at: float) -> float:
+    """Multiplier of an event at `at` relative to the epoch; dividing by the current one gives its decayed value."""
+    return _decay_factor(epoch - at)
+
+
+def _seconds(timestamp: datetime) -> float:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
+def record_post(post_id: int):
+    """Seed a freshly created post with its recency score and drop posts that went cold."""
+    now = time.time()
+
+    def add(pipe):
+        epoch = pipe.get(TRENDING_EPOCH_KEY)
+        # Without an epoch the set is rebuilt from the database on the next read
+        if epoch is None:
+            return
+        growth = _growth(float(epoch), now)
+        pipe.multi()
+        pipe.zadd(TRENDING_KEY, {str(post_id): POST_WEIGHT * growth})
+        pipe.zremrangebyscore(TRENDING_KEY, "-inf", MIN_SCORE * growth)
+        pipe.zremrangebyrank(TRENDING_KEY, 0, -TRENDING_MAX_POSTS - 1)
+        return epoch
+
+    try:
+        epoch = redis_client.transaction(add, TRENDING_EPOCH_KEY, value_from_callable=True)
+        # Also rebased here, so scores cannot overflow while nobody reads the feed
+        if epoch is not None and _rebase_due(epoch):
+            rebase(epoch)
+    except Exception as e:
+        logging.error(f"Error recording post {post_id} in trending: {e}")
+
+
+def _bump(post_id: int, weight: float, at: float):
+    """Add an event of `weight` at time `at` to a post's score, only if the post is still ranked."""
+    def bump(pipe):
+        epoch = pipe.get(TRENDING_EPOCH_KEY)
+        if epoch is None:
+            return
+        pipe.multi()
+        pipe.zadd(TRENDING_KEY, {str(post_id): weight * _growth(float(epoch), at)}, xx=True, incr=True)
+
+    # Watching the epoch keeps a concurrent rebase from mixing scores of two epochs
+    redis_client.transaction(bump, TRENDING_EPOCH_KEY)
+
+
+def record_comment(post_id: int):
+    """Bump a post's score by one comment, only if it is still ranked."""
+    try:
+        _bump(post_id, COMMENT_WEIGHT, time.time())
+    except Exception as e:
+        logging.error(f"Error recording comment on post {post_id} in trending: {e}")
+
+
+def record_comment_removed(post_id: int, timestamp: datetime):
+    """Take back what a deleted comment, written at `timestamp`, added to its post's score."""
+    try:
+        _bump(post_id, -COMMENT_WEIGHT, _seconds(timestamp))
+    except Exception as e:
+        logging.error(f"Error removing comment on post {post_id} from trending: {e}")
+
+
+def remove_post(post_id: int):
+    try:
+        redis_client.zrem(TRENDING_KEY, str(post_id))
+    except Exception as e:
+        logging.error(f"Error removing post {post_id} from trending: {e}")
+
+
+def _rebase_due(epoch: str) -> bool:
+    return time.time() - float(epoch) > REBASE_HALF_LIVES * TRENDING_HALF_LIFE_SECONDS
+
+
+def rebase(epoch: str):
+    """Move the epoch to now, rescaling every score once; a no-op if another process already moved it."""
+    now = time.time()
+
+    def move(pipe):
+        if pipe.get(TRENDING_EPOCH_KEY) != epoch:
+            return
+        pipe.multi()
+        pipe.zunionstore(TRENDING_KEY, {TRENDING_KEY: 1 / _growth(float(epoch), now)})
+        pipe.zremrangebyscore(TRENDING_KEY, "-inf", MIN_SCORE)
+        pipe.set(TRENDING_EPOCH_KEY, now)
+
+    redis_client.transaction(move, TRENDING_EPOCH_KEY)
+
+
+def rebuild_trending(db: Session):
+    """
+    Recompute the sorted set from the database, e.g. after Redis lost its data. The epoch is
+    reset to now, so every score is the decayed score.
+    """
+    now = datetime.now(timezone.utc)
+    since = now - timedelta(hours=TRENDING_WINDOW_HOURS)
+
+    scores = {}
+    for post_id, timestamp in db.query(Post.id, Post.timestamp).filter(Post.timestamp >= since):
+        scores[post_id] = POST_WEIGHT * _decay_factor((now - timestamp).total_seconds())
+
+    comments = (
+        db.query(Comment.post_id, Comment.timestamp)
+        .filter(Comment.timestamp >= since, Comment.post_id.in_(list(scores)))
+    )
+    for post_id, timestamp in comments:
+        scores[post_id] += COMMENT_WEIGHT * _decay_factor((now - timestamp).total_seconds())
+
+    scores = {str(post_id): score for post_id, score in scores.items() if score > MIN_SCORE}
+    pipe = redis_client.pipeline()
+    pipe.delete(TRENDING_KEY)
+    pipe.set(TRENDING_EPOCH_KEY, now.timestamp())
+    if scores:
+        pipe.zadd(TRENDING_KEY, scores)
+        pipe.zremrangebyrank(TRENDING_KEY, 0, -TRENDING_MAX_POSTS - 1)
+    pipe.execute()
+    logging.info(f"Rebuilt trending feed with {len(scores)} posts.")
+
+
+def get_trending_ids(db: Session, skip: int = 0, limit: int = 10) -> tuple[int, list[int]]:
+    """
+    Return the ranked set size and one page of post IDs, rebuilding the set if it or its epoch
+    is missing and rebasing it when the epoch gets old.
+    """
+    epoch = redis_client.get(TRENDING_EPOCH_KEY)
+    if epoch is None or not redis_client.exists(TRENDING_KEY):
+        rebuild_trending(db)
+    elif _rebase_due(epoch):
+        rebase(epoch)
+    total = redis_client.zcard(TRENDING_KEY)
+    ids = redis_client.zrevrange(TRENDING_KEY, skip, skip + limit - 1)
+    return total, [int(post_id) for post_id in ids]
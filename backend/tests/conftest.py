@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Settings are read when `src` is imported, so the two local databases are chosen here
+DATABASE_DIR = tempfile.mkdtemp(prefix="interact-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(DATABASE_DIR, 'primary.db')}")
+os.environ.setdefault("READ_DATABASE_URL", f"sqlite:///{os.path.join(DATABASE_DIR, 'replica.db')}")
+os.environ.setdefault("REDIS_HOST", "127.0.0.1")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
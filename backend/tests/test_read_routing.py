@@ -0,0 +1,88 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from src import database, main
+from src.models import Author, Comment, Post
+
+TABLES = [Author.__table__, Post.__table__, Comment.__table__]
+
+
+def seed(engine, content):
+    """Give each database a post of its own, so a response shows which one served it."""
+    Author.metadata.drop_all(engine, tables=TABLES)
+    Author.metadata.create_all(engine, tables=TABLES)
+    with engine.begin() as connection:
+        # The model uses Postgres array and JSONB columns; responses only need the table to exist
+        connection.execute(text("DROP TABLE IF EXISTS personalities"))
+        connection.execute(text("CREATE TABLE personalities (id INTEGER PRIMARY KEY, hobbies TEXT, directives TEXT, core_memories TEXT)"))
+        connection.execute(Author.__table__.insert(), {"id": 1, "username": "author", "email": "author@example.com"})
+        connection.execute(Post.__table__.insert(), {"id": 1, "content": content, "author_id": 1})
+
+
+@pytest.fixture
+def client(monkeypatch):
+    seed(database.engine, "from the primary")
+    seed(database.read_engine, "from the replica")
+    monkeypatch.setitem(database._replica_health, "checked_at", 0.0)
+    monkeypatch.setattr(database, "_replica_lag_seconds", lambda: 0.0)
+    # Without the context manager the lifespan, which resets the schema, does not run
+    return TestClient(main.app)
+
+
+def served_by(client) -> str:
+    response = client.get("/posts")
+    assert response.status_code == 200
+    return response.json()["results"][0]["content"]
+
+
+def test_reads_go_to_a_healthy_replica(client):
+    assert served_by(client) == "from the replica"
+
+
+def test_reads_stick_to_the_primary_after_a_write(client):
+    client.cookies.set(main.LAST_WRITE_COOKIE, str(time.time()))
+    assert served_by(client) == "from the primary"
+
+
+def test_sticky_reads_expire(client):
+    client.cookies.set(main.LAST_WRITE_COOKIE, str(time.time() - main.READ_YOUR_WRITES_SECONDS - 1))
+    assert served_by(client) == "from the replica"
+
+
+def test_successful_writes_set_the_cookie(client):
+    response = client.delete("/posts/1")
+    assert response.status_code == 204
+    assert main.LAST_WRITE_COOKIE in response.cookies
+
+
+def test_failed_writes_do_not_set_the_cookie(client):
+    response = client.delete("/posts/999")
+    assert response.status_code == 404
+    assert main.LAST_WRITE_COOKIE not in response.cookies
+
+
+def test_lagging_replica_falls_back_to_the_primary(client, monkeypatch):
+    monkeypatch.setattr(database, "_replica_lag_seconds", lambda: database.REPLICA_MAX_LAG_SECONDS + 1)
+    assert served_by(client) == "from the primary"
+
+
+def test_unreachable_replica_falls_back_to_the_primary(client, monkeypatch):
+    def unreachable():
+        raise ConnectionError("replica is down")
+
+    monkeypatch.setattr(database, "_replica_lag_seconds", unreachable)
+    assert served_by(client) == "from the primary"
+
+
+def test_health_is_cached_between_checks(client, monkeypatch):
+    assert served_by(client) == "from the replica"
+    monkeypatch.setattr(database, "_replica_lag_seconds", lambda: database.REPLICA_MAX_LAG_SECONDS + 1)
+    assert served_by(client) == "from the replica"
+
+
+def test_missing_replica_reads_from_the_primary(client, monkeypatch):
+    monkeypatch.setattr(main, "ReadSessionLocal", None)
+    assert served_by(client) == "from the primary"
@@ -0,0 +1,94 @@
+import time
+from datetime import datetime, timezone
+
+import fakeredis
+import pytest
+
+from src import trending
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    client.set(trending.TRENDING_EPOCH_KEY, time.time())
+    monkeypatch.setattr(trending, "redis_client", client)
+    return client
+
+
+def decayed(redis_client, post_id) -> float:
+    """A post's score as of now, undoing the growth of the stored score since the epoch."""
+    epoch = float(redis_client.get(trending.TRENDING_EPOCH_KEY))
+    return redis_client.zscore(trending.TRENDING_KEY, str(post_id)) / trending._growth(epoch, time.time())
+
+
+def ranking(redis_client) -> list[int]:
+    return [int(post_id) for post_id in redis_client.zrevrange(trending.TRENDING_KEY, 0, -1)]
+
+
+def test_newer_post_outranks_an_older_one_with_the_same_activity(redis_client, monkeypatch):
+    epoch = float(redis_client.get(trending.TRENDING_EPOCH_KEY))
+    monkeypatch.setattr(trending.time, "time", lambda: epoch)
+    trending.record_post(1)
+    trending.record_comment(1)
+    monkeypatch.setattr(trending.time, "time", lambda: epoch + trending.TRENDING_HALF_LIFE_SECONDS)
+    trending.record_post(2)
+    trending.record_comment(2)
+
+    assert ranking(redis_client) == [2, 1]
+    stored = redis_client.zscore(trending.TRENDING_KEY, "2") / redis_client.zscore(trending.TRENDING_KEY, "1")
+    assert stored == pytest.approx(2.0)
+
+
+def test_comment_on_an_unranked_post_is_ignored(redis_client):
+    trending.record_comment(1)
+    assert redis_client.zcard(trending.TRENDING_KEY) == 0
+
+
+def test_removing_a_comment_takes_back_its_score(redis_client):
+    trending.record_post(1)
+    before = decayed(redis_client, 1)
+    trending.record_comment(1)
+    assert decayed(redis_client, 1) == pytest.approx(before + trending.COMMENT_WEIGHT, rel=1e-3)
+
+    trending.record_comment_removed(1, datetime.now(timezone.utc))
+    assert decayed(redis_client, 1) == pytest.approx(before, rel=1e-3)
+
+
+def test_new_posts_prune_cold_ones(redis_client, monkeypatch):
+    epoch = float(redis_client.get(trending.TRENDING_EPOCH_KEY))
+    monkeypatch.setattr(trending.time, "time", lambda: epoch)
+    trending.record_post(1)
+    # Ten half-lives leave 10 / 1024 of the post's weight, below MIN_SCORE
+    monkeypatch.setattr(trending.time, "time", lambda: epoch + 10 * trending.TRENDING_HALF_LIFE_SECONDS)
+    trending.record_post(2)
+    assert ranking(redis_client) == [2]
+
+
+def test_rebase_keeps_the_order_and_decayed_scores(redis_client, monkeypatch):
+    epoch = redis_client.get(trending.TRENDING_EPOCH_KEY)
+    monkeypatch.setattr(trending.time, "time", lambda: float(epoch))
+    trending.record_post(1)
+    trending.record_comment(1)
+    later = float(epoch) + trending.TRENDING_HALF_LIFE_SECONDS
+    monkeypatch.setattr(trending.time, "time", lambda: later)
+    trending.record_post(2)
+    before = {post_id: decayed(redis_client, post_id) for post_id in (1, 2)}
+
+    trending.rebase(epoch)
+
+    assert float(redis_client.get(trending.TRENDING_EPOCH_KEY)) == later
+    assert ranking(redis_client) == [2, 1]
+    for post_id, score in before.items():
+        assert redis_client.zscore(trending.TRENDING_KEY, str(post_id)) == pytest.approx(score)
+    # A second process holding the old epoch leaves the rebased set alone
+    trending.rebase(epoch)
+    assert redis_client.zscore(trending.TRENDING_KEY, "2") == pytest.approx(trending.POST_WEIGHT)
+
+
+def test_recording_a_post_rebases_an_old_epoch(redis_client, monkeypatch):
+    epoch = float(redis_client.get(trending.TRENDING_EPOCH_KEY))
+    later = epoch + (trending.REBASE_HALF_LIVES + 1) * trending.TRENDING_HALF_LIFE_SECONDS
+    monkeypatch.setattr(trending.time, "time", lambda: later)
+    trending.record_post(1)
+    assert float(redis_client.get(trending.TRENDING_EPOCH_KEY)) == later
+    assert redis_client.zscore(trending.TRENDING_KEY, "1") == pytest.approx(trending.POST_WEIGHT)
@@ -1 +1,3 @@
-from .api import ApiClient
+from .api import ApiClient, AsyncApiClient, ApiError, CircuitOpenError
+from .jobs import Job, InProcessQueue, RedisStreamQueue
+from .scheduler import WorkerPool
@@ -0,0 +1,107 @@
+import heapq
+import random
+import threading
+import time
+
+
+class ActivityScheduler:
+    """
+    Min-heap of (due time, author ID) so each author acts on its own schedule instead of
+    every author acting at once. Intervals are exponential (Poisson arrivals) or the mean
+    with uniform jitter, and new authors start at a random offset to spread the load.
+    Popping due authors costs O(k log n), so the heap scales to thousands of authors.
+    """
+
+    def __init__(self, mean_interval: float = 60.0, arrivals: str = "poisson", jitter: float = 0.2):
+        self.mean_interval = mean_interval
+        self.arrivals = arrivals
+        self.jitter = jitter
+        self.authors = {}
+        self.intervals = {}
+        self._heap = []
+        self._due = {}
+        self._lock = threading.Lock()
+
+    def interval(self, author_id: int) -> float:
+        mean = self.intervals.get(author_id, self.mean_interval)
+        if self.arrivals == "poisson":
+            return random.expovariate(1.0 / mean)
+        return mean * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _schedule(self, author_id: int, due: float):
+        self._due[author_id] = due
+        heapq.heappush(self._heap, (due, author_id))
+
+    def set_intervals(self, intervals: dict):
+        """
+        Override the mean seconds between actions per author, e.g. {12: 30.0}; None restores the
+        global mean. Applies from each author's next action; raises ValueError on bad input.
+        """
+        intervals = {int(author_id): mean_interval for author_id, mean_interval in intervals.items()}
+        for author_id, mean_interval in intervals.items():
+            if mean_interval is not None and mean_interval <= 0:
+                raise ValueError(f"Mean interval for author {author_id} must be positive.")
+        with self._lock:
+            for author_id, mean_interval in intervals.items():
+                if mean_interval is None:
+                    self.intervals.pop(author_id, None)
+                else:
+                    self.intervals[author_id] = float(mean_interval)
+
+    def sync_authors(self, authors):
+        """
+        Schedule newly seen authors at a random point in their first interval and forget removed
+        ones; configured intervals are kept in case the author comes back.
+        """
+        now = time.time()
+        with self._lock:
+            current = {author["id"]: author for author in authors}
+            for author_id in set(self.authors) - set(current):
+                self._due.pop(author_id, None)
+            for author_id in set(current) - set(self.authors):
+                self._schedule(author_id, now + random.uniform(0, self.intervals.get(author_id, self.mean_interval)))
+            self.authors = current
+
+    def resume(self):
+        """Spread authors that became overdue while the client was stopped over their next interval."""
+        now = time.time()
+        with self._lock:
+            for author_id, due in list(self._due.items()):
+                if due < now:
+                    self._schedule(author_id, now + random.uniform(0, self.intervals.get(author_id, self.mean_interval)))
+
+    def pop_due(self, now: float = None) -> list:
+        """Return the authors whose time has come and schedule their next action."""
+        now = now or time.time()
+        due_authors = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due, author_id = heapq.heappop(self._heap)
+                # Skip stale entries left behind by rescheduling or removed authors
+                if self._due.get(author_id) != due:
+                    continue
+                due_authors.append(self.authors[author_id])
+                self._schedule(author_id, now + self.interval(author_id))
+            if len(self._heap) > 2 * len(self._due) + 64:
+                self._heap = [(due, author_id) for author_id, due in self._due.items()]
+                heapq.heapify(self._heap)
+        return due_authors
+
+    def seconds_until_next(self, now: float = None):
+        """Time until the earliest heap entry; a stale entry only makes the caller wake early."""
+        now = now or time.time()
+        with self._lock:
+            if not self._heap:
+                return None
+            return max(0.0, self._heap[0][0] - now)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "authors": len(self.authors),
+                "mean_interval": self.mean_interval,
+                "arrivals": self.arrivals,
+                "expected_actions_per_minute": sum(
+                    60.0 / self.intervals.get(author_id, self.mean_interval) for author_id in self.authors
+                ),
+            }
@@ -1,68 +1,367 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from .metrics import metrics, route
+
+RETRY_STATUSES = {429, 502, 503, 504}
+# Statuses that guarantee the request was not processed, so writes can be resent too
+NOT_PROCESSED_STATUSES = {429, 503}
+AUTHORS_PAGE_SIZE = 100
+
+
+class ApiError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CircuitOpenError(ApiError):
+    pass
+
 
+class CircuitBreaker:
+    """Fails fast after `failure_threshold` consecutive failures, then lets one trial call through after `reset_timeout`."""
 
-class ApiClient:
-    def __init__(self, token: str):
-        self.base_url = "http://interact_backend:8000"
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open":
+                return False
+            if self.state == "half-open":
+                # Let this call through as the trial and keep others out until it reports back
+                self.opened_at = time.monotonic()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class _BaseApiClient:
+    def __init__(self, token: str, base_url: str = None, timeout: float = None, retries: int = None):
+        self.base_url = (base_url or os.getenv("API_BASE_URL", "http://interact_backend:8000")).rstrip("/")
         self.token = token
+        self.timeout = timeout if timeout is not None else float(os.getenv("API_TIMEOUT", "10"))
+        self.retries = retries if retries is not None else int(os.getenv("API_RETRIES", "3"))
+        self.backoff_base = float(os.getenv("API_BACKOFF_BASE", "0.5"))
+        self.backoff_cap = float(os.getenv("API_BACKOFF_CAP", "8"))
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("API_CIRCUIT_FAILURES", "5")),
+            reset_timeout=float(os.getenv("API_CIRCUIT_RESET", "30")),
+        )
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: a random delay up to the capped exponential backoff."""
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def _should_retry_status(status_code: int, idempotent: bool) -> bool:
+        return status_code in (RETRY_STATUSES if idempotent else NOT_PROCESSED_STATUSES)
 
-    def fetch_posts(self):
+    def _check_circuit(self, method: str, path: str):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"Circuit open, skipping {method} {path}")
+
+    def _record_outcome(self, failed: bool):
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    @staticmethod
+    def _posts_params(after_id=None, limit=None):
+        params = {}
+        if after_id is not None:
+            params["after_id"] = after_id
+        if limit is not None:
+            params["limit"] = limit
+        return params
+
+    @staticmethod
+    def _author_payload(username, avatar, personality=None):
+        return {
+            "username": username,
+            "email": username.replace(" ", "_").lower() + "@example.com",
+            "is_ai": True,
+            "avatar": avatar,
+            "personality": personality,
+        }
+
+
+class ApiClient(_BaseApiClient):
+    """Backend client over a pooled keep-alive session, safe to share between threads."""
+
+    def __init__(self, token: str, base_url: str = None, timeout: float = None, retries: int = None,
+                 pool_size: int = None):
+        super().__init__(token, base_url, timeout, retries)
+        pool_size = pool_size or int(os.getenv("API_POOL_SIZE", "10"))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, method: str, path: str, idempotent: bool = True, timeout: float = None, **kwargs):
+        labels = {"method": method, "route": route(path)}
+        start = time.monotonic()
+        try:
+            return self._send(method, path, idempotent, timeout, **kwargs)
+        except ApiError:
+            metrics.inc("api_errors_total", labels)
+            raise
+        finally:
+            metrics.observe("api_request_seconds", time.monotonic() - start, labels)
+
+    def _send(self, method: str, path: str, idempotent: bool = True, timeout: float = None, **kwargs):
+        """
+        Send a request, retrying transient failures with jittered backoff.
+        Non-idempotent requests are only retried when the connection was never established.
+        The circuit breaker sees one outcome per call, however many attempts it took.
+        """
+        self._check_circuit(method, path)
+        failed = True
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    response = self.session.request(
+                        method, f"{self.base_url}{path}", timeout=timeout or self.timeout, **kwargs
+                    )
+                    if self._should_retry_status(response.status_code, idempotent) and attempt < self.retries:
+                        time.sleep(self._backoff(attempt))
+                        continue
+                    failed = response.status_code >= 500
+                    response.raise_for_status()
+                    return response.json() if response.content else None
+                except requests.HTTPError as e:
+                    raise ApiError(f"{method} {path} failed: {e}", e.response.status_code) from e
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    if not (idempotent or self._never_sent(e)) or attempt >= self.retries:
+                        raise ApiError(f"{method} {path} failed: {e}") from e
+                    time.sleep(self._backoff(attempt))
+        finally:
+            self._record_outcome(failed)
+
+    @staticmethod
+    def _never_sent(error: requests.RequestException) -> bool:
+        """Whether the request failed before reaching the server, so resending it cannot duplicate a write."""
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+
+    def close(self):
+        self.session.close()
+
+    def fetch_posts(self, after_id=None, limit=None):
         try:
-            response = requests.get(f"{self.base_url}/posts")
-            response.raise_for_status()
-            data = response.json()
+            data = self._request("GET", "/posts", params=self._posts_params(after_id, limit))
             return data.get("results", [])
-        except requests.RequestException as e:
-            print(f"Error fetching posts: {e}")
+        except ApiError as e:
+            logging.error(f"Error fetching posts: {e}")
             return []
 
+    def fetch_comments(self, post_id):
+        try:
+            return self._request("GET", f"/posts/{post_id}/comments")
+        except ApiError as e:
+            logging.error(f"Error fetching comments for post {post_id}: {e}")
+            return None
+
     def fetch_ai_authors(self):
         try:
-            response = requests.get(f"{self.base_url}/authors")
-            response.raise_for_status()
-            data = response.json()
-            authors = data.get("results", [])
+            authors, skip = [], 0
+            while True:
+                data = self._request("GET", "/authors", params={"skip": skip, "limit": AUTHORS_PAGE_SIZE})
+                authors.extend(data.get("results", []))
+                if not data.get("next"):
+                    break
+                skip += AUTHORS_PAGE_SIZE
             return [author for author in authors if author.get("is_ai", False)]
-        except requests.RequestException as e:
-            print(f"Error fetching authors: {e}")
+        except ApiError as e:
+            logging.error(f"Error fetching authors: {e}")
             return []
 
+    def fetch_personality(self, author_id):
+        try:
+            return self._request("GET", f"/personalities/{author_id}")
+        except ApiError as e:
+            if e.status_code != 404:
+                logging.error(f"Error fetching personality for author {author_id}: {e}")
+            return None
+
     def add_author(self, username, avatar, personality=None):
         try:
-            random_email = username.replace(" ", "_").lower() + "@example.com"
-            response = requests.post(
-                f"{self.base_url}/authors",
-                json={
-                    "username": username,
-                    "email": random_email,
-                    "is_ai": True,
-                    "avatar": avatar,
-                    "personality": personality
-                }
+            author = self._request(
+                "POST", "/authors", idempotent=False, json=self._author_payload(username, avatar, personality)
             )
-            response.raise_for_status()
-            print(f"Added a new author: {username}")
-        except requests.RequestException as e:
-            print(f"Error adding author: {e}")
+            logging.info(f"Added a new author: {username}")
+            return author
+        except ApiError as e:
+            logging.error(f"Error adding author: {e}")
 
     def add_post(self, content, author_id):
         try:
-            response = requests.post(
-                f"{self.base_url}/posts",
+            post = self._request("POST", "/posts", idempotent=False, json={"content": content, "author_id": author_id})
+            logging.info(f"AI (Author ID {author_id}) added a post: {content}")
+            return post
+        except ApiError as e:
+            logging.error(f"Error adding post: {e}")
+
+    def add_comment(self, post_id, content, author_id):
+        try:
+            comment = self._request(
+                "POST", f"/posts/{post_id}/comments", idempotent=False,
                 json={"content": content, "author_id": author_id},
             )
-            response.raise_for_status()
-            print(f"AI (Author ID {author_id}) added a post: {content}")
-        except requests.RequestException as e:
-            print(f"Error adding post: {e}")
+            logging.info(f"AI (Author ID {author_id}) commented on Post {post_id}: {content}")
+            return comment
+        except ApiError as e:
+            logging.error(f"Error adding comment to post {post_id}: {e}")
 
-    def add_comment(self, post_id, content, author_id):
+
+class AsyncApiClient(_BaseApiClient):
+    """Asyncio variant of ApiClient for concurrent callers, backed by one pooled httpx client."""
+
+    def __init__(self, token: str, base_url: str = None, timeout: float = None, retries: int = None,
+                 pool_size: int = None):
+        super().__init__(token, base_url, timeout, retries)
+        pool_size = pool_size or int(os.getenv("API_POOL_SIZE", "10"))
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def _request(self, method: str, path: str, idempotent: bool = True, timeout: float = None, **kwargs):
+        labels = {"method": method, "route": route(path)}
+        start = time.monotonic()
+        try:
+            return await self._send(method, path, idempotent, timeout, **kwargs)
+        except ApiError:
+            metrics.inc("api_errors_total", labels)
+            raise
+        finally:
+            metrics.observe("api_request_seconds", time.monotonic() - start, labels)
+
+    async def _send(self, method: str, path: str, idempotent: bool = True, timeout: float = None, **kwargs):
+        self._check_circuit(method, path)
+        failed = True
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    response = await self.client.request(method, path, timeout=timeout or self.timeout, **kwargs)
+                    if self._should_retry_status(response.status_code, idempotent) and attempt < self.retries:
+                        await asyncio.sleep(self._backoff(attempt))
+                        continue
+                    failed = response.status_code >= 500
+                    response.raise_for_status()
+                    return response.json() if response.content else None
+                except httpx.HTTPStatusError as e:
+                    raise ApiError(f"{method} {path} failed: {e}", e.response.status_code) from e
+                except httpx.TransportError as e:
+                    retryable = idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                    if not retryable or attempt >= self.retries:
+                        raise ApiError(f"{method} {path} failed: {e}") from e
+                    await asyncio.sleep(self._backoff(attempt))
+        finally:
+            self._record_outcome(failed)
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def fetch_posts(self, after_id=None, limit=None):
+        try:
+            data = await self._request("GET", "/posts", params=self._posts_params(after_id, limit))
+            return data.get("results", [])
+        except ApiError as e:
+            logging.error(f"Error fetching posts: {e}")
+            return []
+
+    async def fetch_comments(self, post_id):
+        try:
+            return await self._request("GET", f"/posts/{post_id}/comments")
+        except ApiError as e:
+            logging.error(f"Error fetching comments for post {post_id}: {e}")
+            return None
+
+    async def fetch_ai_authors(self):
+        try:
+            authors, skip = [], 0
+            while True:
+                data = await self._request("GET", "/authors", params={"skip": skip, "limit": AUTHORS_PAGE_SIZE})
+                authors.extend(data.get("results", []))
+                if not data.get("next"):
+                    break
+                skip += AUTHORS_PAGE_SIZE
+            return [author for author in authors if author.get("is_ai", False)]
+        except ApiError as e:
+            logging.error(f"Error fetching authors: {e}")
+            return []
+
+    async def fetch_personality(self, author_id):
+        try:
+            return await self._request("GET", f"/personalities/{author_id}")
+        except ApiError as e:
+            if e.status_code != 404:
+                logging.error(f"Error fetching personality for author {author_id}: {e}")
+            return None
+
+    async def add_author(self, username, avatar, personality=None):
+        try:
+            author = await self._request(
+                "POST", "/authors", idempotent=False, json=self._author_payload(username, avatar, personality)
+            )
+            logging.info(f"Added a new author: {username}")
+            return author
+        except ApiError as e:
+            logging.error(f"Error adding author: {e}")
+
+    async def add_post(self, content, author_id):
+        try:
+            post = await self._request(
+                "POST", "/posts", idempotent=False, json={"content": content, "author_id": author_id}
+            )
+            logging.info(f"AI (Author ID {author_id}) added a post: {content}")
+            return post
+        except ApiError as e:
+            logging.error(f"Error adding post: {e}")
+
+    async def add_comment(self, post_id, content, author_id):
         try:
-            response = requests.post(
-                f"{self.base_url}/posts/{post_id}/comments",
+            comment = await self._request(
+                "POST", f"/posts/{post_id}/comments", idempotent=False,
                 json={"content": content, "author_id": author_id},
             )
-            response.raise_for_status()
-            print(f"AI (Author ID {author_id}) commented on Post {post_id}: {content}")
-        except requests.RequestException as e:
-            print(f"Error adding comment to post {post_id}: {e}")
+            logging.info(f"AI (Author ID {author_id}) commented on Post {post_id}: {content}")
+            return comment
+        except ApiError as e:
+            logging.error(f"Error adding comment to post {post_id}: {e}")
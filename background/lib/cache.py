@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+
+def cache_key(model: str, prompt: str, options: dict = None) -> str:
+    payload = json.dumps({"model": model, "prompt": prompt, "options": options or {}}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """LRU cache with TTL in a local SQLite file, so entries survive restarts of the bot."""
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS generations "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_generations_accessed_at ON generations (accessed_at)")
+        self._db.commit()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM generations WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE generations SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return row[0]
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO generations (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl, now),
+            )
+            self._db.execute("DELETE FROM generations WHERE expires_at <= ?", (now,))
+            self._db.execute(
+                "DELETE FROM generations WHERE key IN "
+                "(SELECT key FROM generations ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM generations").fetchone()[0]
+
+
+class RedisCache:
+    """LRU cache with TTL in Redis; a sorted set of access times drives eviction."""
+
+    def __init__(self, client, ttl: float, max_entries: int, prefix: str = "generation_cache"):
+        self.client = client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self.index = f"{prefix}:lru"
+
+    def get(self, key: str):
+        value = self.client.get(f"{self.prefix}:{key}")
+        if value is None:
+            self.client.zrem(self.index, key)
+            return None
+        self.client.zadd(self.index, {key: time.time()})
+        return value
+
+    def set(self, key: str, value: str):
+        pipe = self.client.pipeline()
+        pipe.set(f"{self.prefix}:{key}", value, ex=max(1, math.ceil(self.ttl)))
+        pipe.zadd(self.index, {key: time.time()})
+        pipe.execute()
+        overflow = self.client.zcard(self.index) - self.max_entries
+        if overflow > 0:
+            evicted = [key for key, _ in self.client.zpopmin(self.index, overflow)]
+            self.client.delete(*[f"{self.prefix}:{key}" for key in evicted])
+
+    def size(self) -> int:
+        return self.client.zcard(self.index)
+
+
+class GenerationCache:
+    """
+    Content-addressed cache of generated text, with hit counters and per-task bypass.
+    Keys include the job ID, so an entry is only read back when its job is redelivered; the TTL
+    follows the queue's redelivery window and the LRU only has to hold the jobs inside it.
+    """
+
+    def __init__(self, backend=None, bypass_tasks=()):
+        self.backend = backend
+        self.bypass_tasks = set(bypass_tasks)
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, ttl: float):
+        kind = os.getenv("GENERATION_CACHE", "disk")
+        max_entries = int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "1000"))
+        bypass = [task for task in os.getenv("GENERATION_CACHE_BYPASS", "username").split(",") if task]
+        backend = None
+        try:
+            if kind == "disk":
+                backend = DiskCache(os.getenv("GENERATION_CACHE_PATH", "generation_cache.sqlite3"), ttl, max_entries)
+            elif kind == "redis":
+                from redis import Redis
+                client = Redis(host=os.getenv("REDIS_HOST", "redis"), port=6379, decode_responses=True)
+                backend = RedisCache(client, ttl, max_entries)
+        except Exception as e:
+            logging.error(f"Error setting up the {kind} generation cache, caching is disabled: {e}")
+        return cls(backend, bypass)
+
+    def set_ttl(self, ttl: float):
+        """Applies to entries written from now on."""
+        if self.backend is not None:
+            self.backend.ttl = ttl
+
+    def enabled_for(self, task: str) -> bool:
+        return self.backend is not None and task not in self.bypass_tasks
+
+    def get(self, task: str, key: str):
+        if not self.enabled_for(task):
+            with self._lock:
+                self.bypassed += 1
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            logging.error(f"Error reading the generation cache: {e}")
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, task: str, key: str, value: str):
+        if not self.enabled_for(task):
+            return
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            logging.error(f"Error writing the generation cache: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        try:
+            size = self.backend.size() if self.backend else 0
+        except Exception:
+            size = None
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "ttl": self.backend.ttl if self.backend else None,
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,91 @@
+import hashlib
+import random
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+# MinHash in 16 bands of 4 values, matching the backend's index
+PERMUTATIONS = 64
+BANDS = 16
+ROWS = PERMUTATIONS // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+_random = random.Random(42)
+HASH_PARAMS = [(_random.randrange(1, MERSENNE_PRIME), _random.randrange(MERSENNE_PRIME)) for _ in range(PERMUTATIONS)]
+WORD = re.compile(r"\w+")
+
+
+def fingerprint(text: str, min_words: int = 8):
+    """MinHash signature of the text's distinct words, matching the backend's; None for texts too short to compare."""
+    words = WORD.findall(text.lower())
+    if len(words) < min_words:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "big") for word in set(words)]
+    return tuple(min((a * value + b) % MERSENNE_PRIME for value in hashes) & 0xFFFFFFFF for a, b in HASH_PARAMS)
+
+
+def similarity(first: tuple, second: tuple) -> float:
+    """Estimated Jaccard similarity of the word sets behind two signatures."""
+    return sum(x == y for x, y in zip(first, second)) / PERMUTATIONS
+
+
+def bands(value: tuple) -> list:
+    return [(band, value[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures of the `capacity` most recent posts or comments per kind, bucketed by
+    band so a lookup only compares items that share a band instead of scanning the index.
+    """
+
+    def __init__(self, min_similarity: float = 0.7, capacity: int = 10000, min_words: int = 8):
+        self.min_similarity = min_similarity
+        self.capacity = capacity
+        self.min_words = min_words
+        self.items = defaultdict(OrderedDict)
+        self.buckets = defaultdict(set)
+        self.duplicates = 0
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, item_id, text: str):
+        value = fingerprint(text, self.min_words)
+        if value is None:
+            return
+        with self._lock:
+            items = self.items[kind]
+            if item_id in items:
+                return
+            items[item_id] = value
+            for band in bands(value):
+                self.buckets[(kind, *band)].add(item_id)
+            while len(items) > self.capacity:
+                old_id, old_value = items.popitem(last=False)
+                for band in bands(old_value):
+                    bucket = self.buckets[(kind, *band)]
+                    bucket.discard(old_id)
+                    if not bucket:
+                        del self.buckets[(kind, *band)]
+
+    def find(self, kind: str, text: str):
+        """ID of the most similar indexed item at or above `min_similarity`, or None."""
+        value = fingerprint(text, self.min_words)
+        if value is None:
+            return None
+        best = None
+        with self._lock:
+            items = self.items[kind]
+            candidates = set().union(*(self.buckets.get((kind, *band), ()) for band in bands(value)))
+            for item_id in candidates:
+                score = similarity(value, items[item_id])
+                if score >= self.min_similarity and (best is None or score > best[0]):
+                    best = (score, item_id)
+            if best:
+                self.duplicates += 1
+        return best[1] if best else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "indexed": {kind: len(items) for kind, items in self.items.items()},
+                "duplicates": self.duplicates,
+            }
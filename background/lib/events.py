@@ -0,0 +1,97 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+
+POST_ID = re.compile(r"Post (\d+)")
+
+
+class SlidingWindowLimiter:
+    """Allows at most `limit` events in any `window` seconds."""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._events = deque()
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            while self._events and now - self._events[0] >= self.window:
+                self._events.popleft()
+            if len(self._events) >= self.limit:
+                return False
+            self._events.append(now)
+            return True
+
+
+class NewPostListener:
+    """
+    Subscribes to the backend's `new_post` channel and hands the IDs of new posts to
+    `on_posts` in batches: a batch is flushed `debounce` seconds after its first post,
+    so a burst of posts triggers one reaction round.
+    """
+
+    def __init__(self, redis_client, on_posts, channel: str = "new_post", debounce: float = 2.0,
+                 poll_interval: float = 0.2, reconnect_delay: float = 5.0):
+        self.redis_client = redis_client
+        self.on_posts = on_posts
+        self.channel = channel
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+        self.pending = []
+        self.first_pending_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def parse_post_id(data):
+        match = POST_ID.search(data if isinstance(data, str) else data.decode("utf-8"))
+        return int(match.group(1)) if match else None
+
+    def _flush(self):
+        post_ids, self.pending, self.first_pending_at = self.pending, [], None
+        try:
+            self.on_posts(post_ids)
+        except Exception as e:
+            logging.error(f"Error reacting to new posts {post_ids}: {e}")
+
+    def _listen(self, stop: threading.Event):
+        pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        try:
+            while not stop.is_set():
+                message = pubsub.get_message(timeout=self.poll_interval)
+                if message and message.get("type") == "message":
+                    post_id = self.parse_post_id(message["data"])
+                    if post_id is not None:
+                        self.pending.append(post_id)
+                        self.first_pending_at = self.first_pending_at or time.monotonic()
+                if self.pending and time.monotonic() - self.first_pending_at >= self.debounce:
+                    self._flush()
+        finally:
+            pubsub.close()
+
+    def run(self, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                self._listen(stop)
+            except Exception as e:
+                logging.error(f"Error listening to {self.channel}, reconnecting: {e}")
+                stop.wait(self.reconnect_delay)
+
+    def start(self):
+        # A fresh event per run, so a listener that outlived the last stop() still exits
+        self._stop = threading.Event()
+        self.pending, self.first_pending_at = [], None
+        self._thread = threading.Thread(target=self.run, args=(self._stop,), name="new-post-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
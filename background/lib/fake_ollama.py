@@ -0,0 +1,102 @@
+import random
+import threading
+import time
+
+WORDS = (
+    "the a community idea today new people think story share world small together thing "
+    "morning coffee music project learn build remember light city weekend question change"
+).split()
+SENTENCE_WORDS = 12
+CHARS_PER_TOKEN = 4
+
+
+class FakeOllamaClient:
+    """
+    Stand-in for `ollama.Client` that streams filler text at a simulated pace, for load tests
+    without a model server. Prompt evaluation costs `prompt_eval_ms_per_token` per prompt
+    token, minus the tokens already covered by a passed `context`; decoding runs at a
+    normally distributed tokens/s rate. `failure_rate` makes a share of calls raise.
+    `profiles` overrides any of these per model name, e.g. to make a small model faster.
+    """
+
+    def __init__(self, first_token_seconds: float = 0.3, first_token_jitter: float = 0.5,
+                 prompt_eval_ms_per_token: float = 1.0, tokens_per_second: float = 30.0,
+                 tokens_per_second_jitter: float = 5.0, response_tokens: int = 120,
+                 failure_rate: float = 0.0, seed: int = None, profiles: dict = None):
+        self.first_token_seconds = first_token_seconds
+        self.first_token_jitter = first_token_jitter
+        self.prompt_eval_ms_per_token = prompt_eval_ms_per_token
+        self.tokens_per_second = tokens_per_second
+        self.tokens_per_second_jitter = tokens_per_second_jitter
+        self.response_tokens = response_tokens
+        self.failure_rate = failure_rate
+        self.profiles = profiles or {}
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.loaded_models = set()
+        self._lock = threading.Lock()
+
+    def _draw(self, model: str, prompt: str, system: str = None):
+        with self._lock:
+            self.calls += 1
+            # Cold load on the first call per model, as with a real server
+            cold_start = 1.0 if model not in self.loaded_models else 0.0
+            self.loaded_models.add(model)
+            profile = {**vars(self), **self.profiles.get(model, {})}
+            if self.random.random() < profile["failure_rate"]:
+                raise RuntimeError("Simulated model failure")
+            first_token = cold_start + (
+                self.random.lognormvariate(0, profile["first_token_jitter"]) * profile["first_token_seconds"]
+            )
+            rate = max(1.0, self.random.gauss(profile["tokens_per_second"], profile["tokens_per_second_jitter"]))
+            length = max(1, int(self.random.expovariate(1.0 / profile["response_tokens"])))
+            words = [self.random.choice(WORDS) for _ in range(length)]
+        prompt_tokens = (len(prompt) + len(system or "")) // CHARS_PER_TOKEN + 1
+        first_token += prompt_tokens * profile["prompt_eval_ms_per_token"] / 1000
+        return first_token, rate, words, prompt_tokens
+
+    @staticmethod
+    def _text(words) -> list:
+        """Words with a full stop every SENTENCE_WORDS, so sentence limits can trigger."""
+        return [
+            word + (". " if (index + 1) % SENTENCE_WORDS == 0 else " ")
+            for index, word in enumerate(words)
+        ]
+
+    def _stream(self, model, first_token, rate, words, prompt_tokens, context, num_predict, stop):
+        started = time.monotonic()
+        time.sleep(first_token)
+        produced = []
+        for piece in self._text(words[:num_predict]):
+            if any(sequence and sequence in piece for sequence in stop):
+                break
+            produced.append(piece)
+            yield {"model": model, "response": piece, "done": False}
+            time.sleep(1.0 / rate)
+        yield {
+            "model": model,
+            "response": "",
+            "done": True,
+            "context": list(context or []) + list(range(prompt_tokens + len(produced))),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(first_token * 1e9),
+            "eval_count": len(produced),
+            "eval_duration": int(max(1e-6, time.monotonic() - started - first_token) * 1e9),
+            "total_duration": int((time.monotonic() - started) * 1e9),
+        }
+
+    def generate(self, model: str, prompt: str, stream: bool = False, options=None, context=None,
+                 system=None, keep_alive=None, **kwargs):
+        options = options or {}
+        # With a context the system prefix is already evaluated, so only the new prompt costs time
+        first_token, rate, words, prompt_tokens = self._draw(model, prompt, None if context else system)
+        chunks = self._stream(
+            model, first_token, rate, words, prompt_tokens, context,
+            options.get("num_predict", len(words)), options.get("stop") or [],
+        )
+        if stream:
+            return chunks
+        final = {"response": ""}
+        for chunk in chunks:
+            final = {**chunk, "response": final["response"] + chunk["response"]}
+        return final
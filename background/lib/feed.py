@@ -0,0 +1,96 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+
+PAGE_SIZE = 100
+
+
+class FeedSync:
+    """
+    Keeps a bounded buffer of the most recent posts, fetching only posts newer than the
+    highest ID seen so far. Comment threads are fetched lazily and cached per post.
+    """
+
+    def __init__(self, api, capacity: int = 200, thread_ttl: float = 120.0):
+        self.api = api
+        self.capacity = capacity
+        self.thread_ttl = thread_ttl
+        self.last_post_id = None
+        self.posts = OrderedDict()
+        self.threads = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def _add(self, posts):
+        with self._lock:
+            for post in posts:
+                self.posts[post["id"]] = post
+                self.last_post_id = max(self.last_post_id or 0, post["id"])
+            while len(self.posts) > self.capacity:
+                post_id, _ = self.posts.popitem(last=False)
+                self.threads.pop(post_id, None)
+
+    def sync(self) -> list:
+        """Fetch posts created since the last sync and return them, oldest first."""
+        with self._sync_lock:
+            return self._sync()
+
+    def _sync(self) -> list:
+        if self.last_post_id is None:
+            # Bootstrap from the newest page; the feed returns it newest first
+            new_posts = list(reversed(self.api.fetch_posts(limit=min(self.capacity, PAGE_SIZE))))
+            self._add(new_posts)
+            return new_posts
+
+        new_posts = []
+        while True:
+            page = self.api.fetch_posts(after_id=self.last_post_id, limit=PAGE_SIZE)
+            self._add(page)
+            new_posts.extend(page)
+            if len(page) < PAGE_SIZE:
+                break
+        return new_posts
+
+    def recent_posts(self) -> list:
+        with self._lock:
+            return list(self.posts.values())
+
+    def thread(self, post_id: int) -> list:
+        """Comments on a buffered post, refetched when the cached copy is older than `thread_ttl`."""
+        cached = self.threads.get(post_id)
+        if cached and time.monotonic() - cached[0] < self.thread_ttl:
+            return cached[1]
+        comments = self.api.fetch_comments(post_id)
+        if comments is None:
+            return cached[1] if cached else []
+        with self._lock:
+            if post_id in self.posts:
+                self.threads[post_id] = (time.monotonic(), comments)
+        return comments
+
+    def record_comment(self, post_id: int, comment: dict):
+        """Append our own comment to the cached thread instead of refetching it."""
+        with self._lock:
+            cached = self.threads.get(post_id)
+            if cached:
+                cached[1].append(comment)
+
+    def choose_target(self, ai_author):
+        """
+        Pick a post for `ai_author` to comment on: not their own, not one they already
+        commented on (as far as the cache knows), favouring posts with fewer comments.
+        """
+        with self._lock:
+            candidates = []
+            for post in self.posts.values():
+                if post.get("author", {}).get("id") == ai_author["id"]:
+                    continue
+                comments = self.threads.get(post["id"], (0, []))[1]
+                if any(comment.get("author_id") == ai_author["id"] for comment in comments):
+                    continue
+                candidates.append((post, 1.0 / (1 + len(comments))))
+        if not candidates:
+            return None
+        posts, weights = zip(*candidates)
+        return random.choices(posts, weights=weights)[0]
@@ -0,0 +1,176 @@
+import math
+import queue
+import re
+import threading
+import time
+
+SENTENCE_END = re.compile(r"[.!?](?:\s|$)")
+
+# Per-task budgets: max_length in characters, max_sentences cut client-side, stop sequences passed to the model
+TASK_BUDGETS = {
+    "username": {"max_length": 50, "max_sentences": 1, "stop": ["\n"]},
+    "comment": {"max_length": 600, "max_sentences": 5, "stop": ["\n\n\n"]},
+    "post": {"max_length": 2000, "max_sentences": None, "stop": []},
+    "summary": {"max_length": 400, "max_sentences": 3, "stop": ["\n\n"]},
+}
+CHARS_PER_TOKEN = 3
+
+
+class GenerationCancelled(Exception):
+    pass
+
+
+class GenerationFailed(Exception):
+    pass
+
+
+class GenerationResult:
+    def __init__(self, task: str, model: str):
+        self.task = task
+        self.model = model
+        self.content = ""
+        self.tokens = 0
+        self.truncated = False
+        self.cancelled = False
+        self.timed_out = False
+        self.time_to_first_token = None
+        self.duration = 0.0
+        self.tokens_per_second = 0.0
+        self.prompt_eval_count = None
+        self.prompt_eval_duration = None
+        self.context = None
+
+    def to_dict(self):
+        return {
+            "task": self.task,
+            "model": self.model,
+            "tokens": self.tokens,
+            "truncated": self.truncated,
+            "cancelled": self.cancelled,
+            "timed_out": self.timed_out,
+            "time_to_first_token": self.time_to_first_token,
+            "duration": self.duration,
+            "tokens_per_second": self.tokens_per_second,
+            "prompt_eval_count": self.prompt_eval_count,
+            "prompt_eval_duration": self.prompt_eval_duration,
+        }
+
+
+def budget_options(max_length: int, stop=None, options=None) -> dict:
+    """Model options capping generation at roughly `max_length` characters."""
+    budget = {"num_predict": math.ceil(max_length / CHARS_PER_TOKEN)}
+    if stop:
+        budget["stop"] = stop
+    return {**budget, **(options or {})}
+
+
+def limit_reached(text: str, max_length: int, max_sentences=None) -> bool:
+    if len(text) >= max_length:
+        return True
+    return bool(max_sentences) and len(SENTENCE_END.findall(text)) >= max_sentences
+
+
+def _pump(stream, chunks: queue.Queue, abandoned: threading.Event):
+    """Read `stream` into `chunks` until it ends or the reader is abandoned, then close it."""
+    try:
+        for chunk in stream:
+            chunks.put(chunk)
+            if chunk.get("done") or abandoned.is_set():
+                break
+    except Exception as e:
+        chunks.put(e)
+    finally:
+        chunks.put(None)
+        if hasattr(stream, "close"):
+            stream.close()
+
+
+def stream_generate(client, model: str, prompt: str, task: str = "post", max_length: int = None,
+                    max_sentences=None, stop=None, options=None, should_cancel=None, timeout=None,
+                    poll_interval: float = 0.1, **generate_kwargs) -> GenerationResult:
+    """
+    Stream a completion from Ollama and stop reading as soon as the length or sentence
+    limit is reached, which closes the stream and ends generation on the server.
+    The stream is read on a helper thread, so `should_cancel` and `timeout` are checked every
+    `poll_interval` seconds even while the model has not produced its first token.
+    """
+    budget = TASK_BUDGETS.get(task, TASK_BUDGETS["post"])
+    max_length = max_length or budget["max_length"]
+    max_sentences = max_sentences if max_sentences is not None else budget["max_sentences"]
+    stop = stop if stop is not None else budget["stop"]
+
+    result = GenerationResult(task, model)
+    parts = []
+    final = None
+    start = time.monotonic()
+    stream = client.generate(
+        model=model,
+        prompt=prompt,
+        stream=True,
+        options=budget_options(max_length, stop, options),
+        **generate_kwargs,
+    )
+    chunks = queue.Queue()
+    abandoned = threading.Event()
+    threading.Thread(target=_pump, args=(stream, chunks, abandoned), name=f"stream-{task}", daemon=True).start()
+    try:
+        while True:
+            try:
+                chunk = chunks.get(timeout=poll_interval)
+            except queue.Empty:
+                chunk = {}
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            text = chunk.get("response", "")
+            if text:
+                if result.time_to_first_token is None:
+                    result.time_to_first_token = time.monotonic() - start
+                parts.append(text)
+                result.tokens += 1
+            if chunk.get("done"):
+                final = chunk
+                break
+            if should_cancel and should_cancel():
+                result.cancelled = True
+                break
+            if timeout and time.monotonic() - start > timeout:
+                result.timed_out = True
+                break
+            if limit_reached("".join(parts), max_length, max_sentences):
+                result.truncated = True
+                break
+    finally:
+        # A reader still waiting on the server closes the stream when its next chunk arrives
+        abandoned.set()
+
+    result.duration = time.monotonic() - start
+    result.content = "".join(parts)
+    if final is not None:
+        result.context = final.get("context")
+        result.prompt_eval_count = final.get("prompt_eval_count")
+        if final.get("prompt_eval_duration"):
+            result.prompt_eval_duration = final["prompt_eval_duration"] / 1e9
+        if final.get("eval_count") and final.get("eval_duration"):
+            result.tokens = final["eval_count"]
+            result.tokens_per_second = final["eval_count"] / (final["eval_duration"] / 1e9)
+    if not result.tokens_per_second and result.time_to_first_token is not None:
+        generating = result.duration - result.time_to_first_token
+        result.tokens_per_second = (result.tokens - 1) / generating if generating > 0 else 0.0
+    return result
+
+
+def truncate_content(content: str, max_length: int, max_sentences=None) -> str:
+    """Cut content to whole sentences when possible, otherwise to whole words, within the limits."""
+    if max_sentences:
+        ends = [match.end() for match in SENTENCE_END.finditer(content)]
+        if len(ends) >= max_sentences:
+            content = content[:ends[max_sentences - 1]]
+    if len(content) <= max_length:
+        return content.strip()
+    cut = content[:max_length]
+    sentence_ends = [match.end() for match in SENTENCE_END.finditer(cut)]
+    if sentence_ends and sentence_ends[-1] > max_length // 2:
+        return cut[:sentence_ends[-1]].strip()
+    return cut.rsplit(" ", 1)[0].strip() if " " in cut else cut.strip()
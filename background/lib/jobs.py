@@ -0,0 +1,220 @@
+import heapq
+import itertools
+import json
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import deque
+
+# Lower runs first: a username bootstraps an author, comments answer live threads, posts can wait
+PRIORITIES = {"username": 0, "comment": 1, "post": 2}
+
+
+class Job:
+    def __init__(self, type: str, author=None, payload=None, key=None, priority=None, id=None,
+                 created_at=None, attempts=0):
+        self.type = type
+        self.author = author
+        self.payload = payload or {}
+        self.priority = PRIORITIES.get(type, len(PRIORITIES)) if priority is None else priority
+        # Jobs sharing a key are deduplicated while one of them is queued or running
+        self.key = key or (f"{type}:{author['id']}" if author else type)
+        self.id = id or uuid.uuid4().hex
+        self.created_at = created_at or time.time()
+        self.attempts = attempts
+
+    def to_dict(self):
+        return {
+            "type": self.type,
+            "author": self.author,
+            "payload": self.payload,
+            "key": self.key,
+            "priority": self.priority,
+            "id": self.id,
+            "created_at": self.created_at,
+            "attempts": self.attempts,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __repr__(self):
+        return f"Job({self.type}, key={self.key}, attempts={self.attempts})"
+
+
+class InProcessQueue:
+    """
+    Priority queue with dedup by job key and at-least-once delivery: a job handed to a
+    worker is redelivered if it is not acked within `visibility_timeout`.
+    """
+
+    def __init__(self, visibility_timeout: float = 300.0, max_attempts: int = 3):
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._heap = []
+        self._counter = itertools.count()
+        self._keys = set()
+        self._in_flight = {}
+        self._condition = threading.Condition()
+
+    def put(self, job: Job) -> bool:
+        with self._condition:
+            if job.key in self._keys:
+                return False
+            self._keys.add(job.key)
+            heapq.heappush(self._heap, (job.priority, next(self._counter), job))
+            self._condition.notify()
+            return True
+
+    def _requeue_expired(self):
+        now = time.monotonic()
+        for job_id, (job, deadline) in list(self._in_flight.items()):
+            if deadline <= now:
+                del self._in_flight[job_id]
+                # An expired delivery counts as a failed attempt, like a nack
+                job.attempts += 1
+                if job.attempts >= self.max_attempts:
+                    logging.error(f"Dropping {job} after {job.attempts} attempts, the last one not acked in time.")
+                    self._keys.discard(job.key)
+                    continue
+                logging.warning(f"{job} was not acked in time, redelivering.")
+                heapq.heappush(self._heap, (job.priority, next(self._counter), job))
+
+    def get(self, timeout: float = 1.0):
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                self._requeue_expired()
+                if self._heap:
+                    _, _, job = heapq.heappop(self._heap)
+                    self._in_flight[job.id] = (job, time.monotonic() + self.visibility_timeout)
+                    return job
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def ack(self, job: Job):
+        with self._condition:
+            self._in_flight.pop(job.id, None)
+            self._keys.discard(job.key)
+
+    def nack(self, job: Job):
+        with self._condition:
+            self._in_flight.pop(job.id, None)
+            job.attempts += 1
+            if job.attempts >= self.max_attempts:
+                logging.error(f"Dropping {job} after {job.attempts} attempts.")
+                self._keys.discard(job.key)
+                return
+            heapq.heappush(self._heap, (job.priority, next(self._counter), job))
+            self._condition.notify()
+
+    def depth(self) -> int:
+        with self._condition:
+            return len(self._heap)
+
+    def in_flight(self) -> int:
+        with self._condition:
+            return len(self._in_flight)
+
+
+class RedisStreamQueue:
+    """
+    Same contract as InProcessQueue on Redis Streams: one stream per priority read through a
+    consumer group, a dedup key per job, and XAUTOCLAIM to redeliver jobs of crashed workers.
+    """
+
+    def __init__(self, client, name: str = "generation_jobs", group: str = "generators", consumer: str = None,
+                 visibility_timeout: float = 300.0, max_attempts: int = 3):
+        self.client = client
+        self.name = name
+        self.group = group
+        self.consumer = consumer or uuid.uuid4().hex
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.streams = [f"{name}:p{priority}" for priority in sorted(set(PRIORITIES.values()))]
+        # Entries already delivered to this consumer by a multi-stream read, highest priority first
+        self._delivered = deque()
+        for stream in self.streams:
+            try:
+                self.client.xgroup_create(stream, group, id="0", mkstream=True)
+            except Exception as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    def _stream(self, job: Job) -> str:
+        return self.streams[min(job.priority, len(self.streams) - 1)]
+
+    def _dedup_key(self, job: Job) -> str:
+        return f"{self.name}:dedup:{job.key}"
+
+    def put(self, job: Job) -> bool:
+        ttl = max(1, math.ceil(self.visibility_timeout * self.max_attempts))
+        if not self.client.set(self._dedup_key(job), job.id, nx=True, ex=ttl):
+            return False
+        self.client.xadd(self._stream(job), {"job": json.dumps(job.to_dict())})
+        return True
+
+    def _decode(self, stream: str, message_id, fields) -> Job:
+        job = Job.from_dict(json.loads(fields["job"]))
+        job.stream, job.message_id = stream, message_id
+        return job
+
+    def get(self, timeout: float = 1.0):
+        try:
+            return self._delivered.popleft()
+        except IndexError:
+            pass
+        idle_ms = int(self.visibility_timeout * 1000)
+        for stream in self.streams:
+            _, claimed, *_ = self.client.xautoclaim(stream, self.group, self.consumer, idle_ms, count=1)
+            if claimed:
+                # A job its worker never acked counts as a failed attempt: requeue it with the
+                # attempt recorded in the message, or drop it at max_attempts
+                job = self._decode(stream, *claimed[0])
+                logging.warning(f"{job} was not acked in time, redelivering.")
+                self.nack(job)
+            messages = self.client.xreadgroup(self.group, self.consumer, {stream: ">"}, count=1)
+            if messages:
+                stream_name, entries = messages[0]
+                return self._decode(stream_name, *entries[0])
+        messages = self.client.xreadgroup(
+            self.group, self.consumer, {stream: ">" for stream in self.streams}, count=1, block=int(timeout * 1000)
+        )
+        # count=1 applies per stream, so one read can deliver an entry from each of them; the ones
+        # not returned now are kept for the next get() instead of waiting out the visibility timeout
+        jobs = sorted(
+            (self._decode(stream_name, *entry) for stream_name, entries in messages or () for entry in entries),
+            key=lambda job: self.streams.index(job.stream),
+        )
+        if not jobs:
+            return None
+        self._delivered.extend(jobs[1:])
+        return jobs[0]
+
+    def _remove(self, job: Job):
+        self.client.xack(job.stream, self.group, job.message_id)
+        self.client.xdel(job.stream, job.message_id)
+
+    def ack(self, job: Job):
+        self._remove(job)
+        self.client.delete(self._dedup_key(job))
+
+    def nack(self, job: Job):
+        self._remove(job)
+        job.attempts += 1
+        if job.attempts >= self.max_attempts:
+            logging.error(f"Dropping {job} after {job.attempts} attempts.")
+            self.client.delete(self._dedup_key(job))
+            return
+        self.client.xadd(self._stream(job), {"job": json.dumps(job.to_dict())})
+
+    def depth(self) -> int:
+        return sum(self.client.xlen(stream) for stream in self.streams) - self.in_flight()
+
+    def in_flight(self) -> int:
+        return sum(self.client.xpending(stream, self.group)["pending"] for stream in self.streams)
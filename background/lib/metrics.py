@@ -0,0 +1,113 @@
+import bisect
+import re
+import threading
+from collections import defaultdict
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 40, 80, 160)
+ID_SEGMENT = re.compile(r"/\d+")
+
+
+def route(path: str) -> str:
+    """Collapse numeric path segments so each endpoint is one label value."""
+    return ID_SEGMENT.sub("/{id}", path)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Minimal in-process registry of counters, histograms and gauges, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self.help = {}
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict = None):
+        return name, tuple(sorted((labels or {}).items()))
+
+    def inc(self, name: str, labels: dict = None, value: float = 1.0):
+        with self._lock:
+            self.counters[self._key(name, labels)] += value
+
+    def observe(self, name: str, value: float, labels: dict = None, buckets=LATENCY_BUCKETS):
+        key = self._key(name, labels)
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(buckets)
+            self.histograms[key].observe(value)
+
+    def gauge(self, name: str, read, help_text: str = None):
+        """Register a gauge whose value is read from `read()` at scrape time."""
+        self.gauges[name] = read
+        if help_text:
+            self.help[name] = help_text
+
+    def describe(self, name: str, help_text: str):
+        self.help[name] = help_text
+
+    @staticmethod
+    def _labels(labels, extra=()) -> str:
+        pairs = [f'{key}="{value}"' for key, value in (*labels, *extra)]
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def _header(self, lines, seen, name, kind):
+        if name in seen:
+            return
+        seen.add(name)
+        if name in self.help:
+            lines.append(f"# HELP {name} {self.help[name]}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def render(self) -> str:
+        lines, seen = [], set()
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                self._header(lines, seen, name, "counter")
+                lines.append(f"{name}{self._labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                self._header(lines, seen, name, "histogram")
+                cumulative = 0
+                for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{self._labels(labels, (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{self._labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{self._labels(labels)} {histogram.count}")
+        for name, read in sorted(self.gauges.items()):
+            try:
+                value = read()
+            except Exception:
+                continue
+            self._header(lines, seen, name, "gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+metrics.describe("generation_seconds", "Wall time of one generation, by task type and model")
+metrics.describe("generation_first_token_seconds", "Time to first streamed token, by task type and model")
+metrics.describe("generation_tokens_per_second", "Decode rate of one generation, by task type and model")
+metrics.describe("generation_tokens_total", "Tokens generated, by task type and model")
+metrics.describe("generation_errors_total", "Failed generations, by task type and model")
+metrics.describe("generation_timeouts_total", "Generations stopped at the route timeout, by task type and model")
+metrics.describe("generation_fallbacks_total", "Generations served by a route's fallback model, by task type and model")
+metrics.describe("generation_duplicates_total", "Generations discarded as near-duplicates, by task type")
+metrics.describe("api_request_seconds", "Backend API call latency including retries, by method and route")
+metrics.describe("api_errors_total", "Failed backend API calls, by method and route")
+metrics.describe("decision_cycle_seconds", "Time spent planning one decision loop iteration")
+metrics.describe("job_seconds", "Time from queueing a job to finishing it, by job type")
+metrics.describe("jobs_total", "Finished jobs, by job type and outcome")
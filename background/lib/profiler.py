@@ -0,0 +1,31 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def _collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+def sample_threads(thread_prefix: str, duration: float = 5.0, interval: float = 0.01) -> Counter:
+    """
+    Sample the stacks of threads whose name starts with `thread_prefix` every `interval`
+    seconds for `duration` seconds. Returns collapsed stacks (flame graph input) with counts.
+    """
+    samples = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        threads = {thread.ident: thread for thread in threading.enumerate() if thread.name.startswith(thread_prefix)}
+        frames = sys._current_frames()
+        for ident in threads:
+            frame = frames.get(ident)
+            if frame is not None:
+                samples[f"{threads[ident].name};{_collapse(frame)}"] += 1
+        time.sleep(interval)
+    return samples
@@ -0,0 +1,113 @@
+import threading
+import time
+
+CHARS_PER_TOKEN = 4
+PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class PromptBuilder:
+    """
+    Builds a stable, token-budgeted system prefix from each author's personality and keeps the
+    `context` Ollama returns per author and model, so follow-up calls continue from the already
+    evaluated prefix instead of processing it again. Contexts are token IDs of one model and
+    cannot be passed to another.
+    """
+
+    def __init__(self, api, personality_ttl: float = 600.0, prefix_token_budget: int = 256,
+                 max_context_tokens: int = 4096):
+        self.api = api
+        self.personality_ttl = personality_ttl
+        self.prefix_token_budget = prefix_token_budget
+        self.max_context_tokens = max_context_tokens
+        self.personalities = {}
+        self.contexts = {}
+        self.fresh_calls = 0
+        self.reused_calls = 0
+        self.fresh_eval_tokens = 0
+        self.fresh_eval_seconds = 0.0
+        self.reused_prefix_tokens = 0
+        self._lock = threading.Lock()
+
+    def personality(self, author_id: int):
+        cached = self.personalities.get(author_id)
+        if cached and time.monotonic() - cached[0] < self.personality_ttl:
+            return cached[1]
+        personality = self.api.fetch_personality(author_id)
+        with self._lock:
+            self.personalities[author_id] = (time.monotonic(), personality)
+        return personality
+
+    def system_prefix(self, author) -> str:
+        """
+        Persona description for `author`, always rendered in the same order so it is byte-stable
+        across calls. Lower-priority directives and memories are dropped to fit the token budget.
+        """
+        lines = [f"You are {author['username']}, an author on a social media platform. Stay in character."]
+        personality = self.personality(author["id"]) or {}
+        if personality.get("hobbies"):
+            lines.append(f"Your hobbies: {', '.join(personality['hobbies'])}.")
+
+        directives = sorted(
+            personality.get("directives") or [],
+            key=lambda directive: (PRIORITY_ORDER.get(directive.get("priority"), 3), directive.get("task", "")),
+        )
+        memories = sorted(
+            personality.get("core_memories") or [],
+            key=lambda memory: (PRIORITY_ORDER.get(memory.get("importance"), 3), memory.get("memory", "")),
+        )
+        optional = [f"Directive ({directive['priority']}): {directive['task']}." for directive in directives]
+        optional += [f"You remember: {memory['memory']}." for memory in memories]
+
+        used = estimate_tokens("\n".join(lines))
+        for line in optional:
+            cost = estimate_tokens(line)
+            if used + cost > self.prefix_token_budget:
+                break
+            lines.append(line)
+            used += cost
+        return "\n".join(lines)
+
+    def generation_kwargs(self, author, model: str) -> dict:
+        """
+        Arguments for Ollama: the stored context when there is one (it already contains the prefix),
+        otherwise the system prefix to start a new context from.
+        """
+        with self._lock:
+            context = self.contexts.get((author["id"], model))
+        if context:
+            return {"context": context}
+        return {"system": self.system_prefix(author)}
+
+    def record(self, author, kwargs: dict, result):
+        """Store the returned context and account for the prompt evaluation it saved."""
+        with self._lock:
+            if "context" in kwargs:
+                self.reused_calls += 1
+                self.reused_prefix_tokens += len(kwargs["context"])
+            else:
+                self.fresh_calls += 1
+                if result.prompt_eval_count and result.prompt_eval_duration:
+                    self.fresh_eval_tokens += result.prompt_eval_count
+                    self.fresh_eval_seconds += result.prompt_eval_duration
+
+            key = (author["id"], result.model)
+            if result.context and len(result.context) <= self.max_context_tokens:
+                self.contexts[key] = result.context
+            else:
+                # Truncated streams return no context, and long ones are restarted from the prefix
+                self.contexts.pop(key, None)
+
+    def stats(self) -> dict:
+        seconds_per_token = self.fresh_eval_seconds / self.fresh_eval_tokens if self.fresh_eval_tokens else 0.0
+        return {
+            "authors": len(self.personalities),
+            "fresh_calls": self.fresh_calls,
+            "reused_calls": self.reused_calls,
+            "reused_prefix_tokens": self.reused_prefix_tokens,
+            "prompt_eval_seconds_per_token": seconds_per_token,
+            "estimated_prompt_eval_seconds_saved": self.reused_prefix_tokens * seconds_per_token,
+        }
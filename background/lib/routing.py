@@ -0,0 +1,131 @@
+import json
+import logging
+import os
+import threading
+from collections import defaultdict, deque
+
+ROUTE_FIELDS = ("model", "fallback", "options", "timeout")
+
+
+class RouteStats:
+    def __init__(self, window: int = 200):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.fallbacks = 0
+        self.truncated = 0
+        self.empty = 0
+        self.latencies = deque(maxlen=window)
+        self.tokens_per_second = deque(maxlen=window)
+
+    def to_dict(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "fallbacks": self.fallbacks,
+            "truncated": self.truncated,
+            "empty": self.empty,
+            "latency_avg": sum(latencies) / len(latencies) if latencies else 0.0,
+            "latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+            "tokens_per_second": (
+                sum(self.tokens_per_second) / len(self.tokens_per_second) if self.tokens_per_second else 0.0
+            ),
+        }
+
+
+class ModelRouter:
+    """
+    Maps each task type to a model, its options and a timeout, with a fallback model tried
+    when the primary errors or times out. Short tasks default to a small model so the large
+    one is kept for posts. Latency and quality counters are kept per task and model.
+    """
+
+    def __init__(self, routes: dict):
+        self.routes = routes
+        self.stats_by_route = defaultdict(RouteStats)
+        self.duplicates = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        large = os.getenv("OLLAMA_MODEL", "gemma2:latest")
+        small = os.getenv("OLLAMA_SMALL_MODEL", "gemma2:2b")
+        routes = {
+            "username": {"model": small, "fallback": large, "options": {"temperature": 1.0}, "timeout": 20.0},
+            "comment": {"model": small, "fallback": large, "options": {"temperature": 0.8}, "timeout": 60.0},
+            "post": {"model": large, "fallback": small, "options": {"temperature": 0.8}, "timeout": 180.0},
+            "summary": {"model": small, "fallback": large, "options": {"temperature": 0.3}, "timeout": 60.0},
+        }
+        router = cls(routes)
+        try:
+            router.update(json.loads(os.getenv("MODEL_ROUTES", "{}")))
+        except ValueError as e:
+            logging.error(f"Ignoring invalid MODEL_ROUTES: {e}")
+        return router
+
+    def route(self, task: str) -> dict:
+        with self._lock:
+            return dict(self.routes.get(task, self.routes["post"]))
+
+    def models(self, task: str) -> list:
+        """Models to try for `task`, in order."""
+        route = self.route(task)
+        models = [route["model"]]
+        if route.get("fallback") and route["fallback"] != route["model"]:
+            models.append(route["fallback"])
+        return models
+
+    def max_seconds(self, task: str, default_timeout: float) -> float:
+        """Longest one generation for `task` can take: each model tried up to the route timeout."""
+        route = self.route(task)
+        return len(self.models(task)) * (route.get("timeout") or default_timeout)
+
+    def update(self, changes: dict):
+        """Merge per-task changes, e.g. {"comment": {"model": "llama3.2:1b"}}; raises ValueError on bad input."""
+        for task, route in changes.items():
+            if not isinstance(route, dict) or set(route) - set(ROUTE_FIELDS):
+                raise ValueError(f"Route for {task} must be an object with keys from {ROUTE_FIELDS}.")
+            if "timeout" in route and route["timeout"] is not None and route["timeout"] <= 0:
+                raise ValueError(f"Route timeout for {task} must be positive.")
+            if task not in self.routes and "model" not in route:
+                raise ValueError(f"New route {task} needs a model.")
+        with self._lock:
+            for task, route in changes.items():
+                self.routes[task] = {**self.routes.get(task, {}), **route}
+
+    def use_model(self, model: str):
+        """Send every task to `model`, keeping the configured fallbacks."""
+        with self._lock:
+            for route in self.routes.values():
+                route["model"] = model
+
+    def record(self, task: str, model: str, outcome: str, result=None, fallback: bool = False):
+        """Count one attempt; `outcome` is "ok", "error" or "timeout"."""
+        with self._lock:
+            stats = self.stats_by_route[(task, model)]
+            stats.calls += 1
+            stats.fallbacks += fallback
+            if outcome == "error":
+                stats.errors += 1
+            elif outcome == "timeout":
+                stats.timeouts += 1
+            if result is not None:
+                stats.latencies.append(result.duration)
+                stats.tokens_per_second.append(result.tokens_per_second)
+                stats.truncated += result.truncated
+                stats.empty += outcome == "ok" and not result.content
+
+    def record_duplicate(self, task: str):
+        with self._lock:
+            self.duplicates[task] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {task: {"route": dict(route), "models": {}} for task, route in self.routes.items()}
+            for (task, model), route_stats in self.stats_by_route.items():
+                stats.setdefault(task, {"route": None, "models": {}})["models"][model] = route_stats.to_dict()
+            for task, count in self.duplicates.items():
+                stats.setdefault(task, {"route": None, "models": {}})["duplicates"] = count
+            return stats
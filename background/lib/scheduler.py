@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+
+from .metrics import metrics
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that backs off when task latency rises above a target
+    (additive increase, multiplicative decrease on a smoothed latency).
+    """
+
+    def __init__(self, max_limit: int, target_latency: float, smoothing: float = 0.3):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self.target_latency = target_latency
+        self.smoothing = smoothing
+        self.latency = None
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Take a slot, waiting at most `timeout` seconds; returns whether a slot was taken."""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.in_flight < self.limit, timeout):
+                return False
+            self.in_flight += 1
+            return True
+
+    def resize(self, max_limit: int = None, target_latency: float = None):
+        with self._condition:
+            if max_limit is not None:
+                # Added slots are usable at once, removed ones as soon as their tasks finish
+                self.limit = max(1, min(self.limit + max(0, max_limit - self.max_limit), max_limit))
+                self.max_limit = max_limit
+            if target_latency is not None:
+                self.target_latency = target_latency
+            self._condition.notify_all()
+
+    def release(self, latency: float = None):
+        """Free a slot; `latency` is None when the slot went unused and should not move the limit."""
+        with self._condition:
+            self.in_flight -= 1
+            if latency is None:
+                self._condition.notify_all()
+                return
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency = self.smoothing * latency + (1 - self.smoothing) * self.latency
+            if self.latency > self.target_latency and self.limit > 1:
+                self.limit = max(1, self.limit // 2)
+                logging.info(f"Generation latency {self.latency:.1f}s above target, concurrency down to {self.limit}.")
+            elif self.latency < self.target_latency * 0.8 and self.limit < self.max_limit:
+                self.limit += 1
+            self._condition.notify_all()
+
+
+class WorkerPool:
+    """
+    Generator workers draining a job queue. Each job runs under the adaptive limiter, so the
+    pool sheds concurrency when generation latency rises; failed jobs are nacked for retry.
+    """
+
+    def __init__(self, queue, handler, workers: int = 4, target_latency: float = 30.0, poll_interval: float = 0.25):
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.limiter = AdaptiveLimiter(workers, target_latency)
+        self.completed = 0
+        self.failed = 0
+        self.busy_time = 0.0
+        self.started_at = None
+        self._threads = {}
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def _work(self, index: int, stop: threading.Event):
+        # Workers above the current pool size exit, which is how resize() shrinks the pool.
+        # `stop` belongs to the run that spawned the worker, so a restart never revives old workers.
+        while not stop.is_set() and index < self.workers:
+            # Take a slot before a job so a stopping worker never holds an unstarted job
+            if not self.limiter.acquire(timeout=self.poll_interval):
+                continue
+            job = self.queue.get(timeout=self.poll_interval)
+            if job is None:
+                self.limiter.release()
+                continue
+            start = time.monotonic()
+            try:
+                self.handler(job)
+                self.queue.ack(job)
+                with self._lock:
+                    self.completed += 1
+                metrics.inc("jobs_total", {"type": job.type, "outcome": "completed"})
+                metrics.observe("job_seconds", time.time() - job.created_at, {"type": job.type})
+            except Exception as e:
+                logging.error(f"Error processing {job}: {e}")
+                self.queue.nack(job)
+                with self._lock:
+                    self.failed += 1
+                metrics.inc("jobs_total", {"type": job.type, "outcome": "failed"})
+            finally:
+                elapsed = time.monotonic() - start
+                self.limiter.release(elapsed)
+                with self._lock:
+                    self.busy_time += elapsed
+
+    def _spawn(self):
+        for index in range(self.workers):
+            if index not in self._threads or not self._threads[index].is_alive():
+                self._threads[index] = threading.Thread(
+                    target=self._work, args=(index, self._stop), name=f"generator-{index}", daemon=True
+                )
+                self._threads[index].start()
+
+    def start(self):
+        self._stop = threading.Event()
+        self.started_at = time.monotonic()
+        self._spawn()
+
+    def resize(self, workers: int = None, target_latency: float = None):
+        """Change the pool size and latency target while running; surplus workers exit after their current job."""
+        if workers is not None:
+            self.workers = workers
+        self.limiter.resize(workers, target_latency)
+        if self._threads and not self._stop.is_set():
+            self._spawn()
+
+    def stop(self, timeout: float = None):
+        """
+        Signal the workers and wait up to `timeout` seconds in total. Workers still inside a
+        job are daemon threads and finish or get cancelled by the handler on their own; they
+        keep this run's stop signal, so they exit afterwards even if the pool is started again.
+        """
+        self._stop.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads.values():
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        self._threads = {}
+
+    def stats(self) -> dict:
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "workers": self.workers,
+            "target_latency": self.limiter.target_latency,
+            "concurrency_limit": self.limiter.limit,
+            "completed": self.completed,
+            "failed": self.failed,
+            "jobs_per_minute": self.completed / elapsed * 60 if elapsed else 0.0,
+            # Average number of jobs running at once, i.e. the speedup over one serial worker
+            "parallelism": self.busy_time / elapsed if elapsed else 0.0,
+            "queue_depth": self.queue.depth(),
+        }
@@ -1,25 +1,130 @@
+import json
 import logging
 import os
 import random
 import string
 import time
+from collections import deque
 from contextlib import asynccontextmanager
-from threading import Thread
+from typing import Any, Dict, Optional
+from threading import Event, Thread
 from ollama import Client
 
 from fastapi import FastAPI, HTTPException
-
-from lib import ApiClient
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from lib import ApiClient, Job, InProcessQueue, RedisStreamQueue, WorkerPool
+from lib.activity import ActivityScheduler
+from lib.events import NewPostListener, SlidingWindowLimiter
+from lib.feed import FeedSync
+from lib.cache import GenerationCache, cache_key
+from lib.dedup import NearDuplicateIndex
+from lib.prompts import PromptBuilder
+from lib.routing import ModelRouter
+from lib.generation import TASK_BUDGETS, GenerationCancelled, GenerationFailed, stream_generate, truncate_content
+from lib.metrics import RATE_BUCKETS, metrics
+from lib.profiler import sample_threads
 
 logging.basicConfig(level=logging.INFO)
 
+MIN_TICK = 0.5
+FEED_SYNC_INTERVAL = 5.0
+SHUTDOWN_TIMEOUT = 1.0
+# Slack on top of generation time for the backend calls a job makes
+JOB_OVERHEAD_SECONDS = 60.0
+
 
 class AIClient:
     def __init__(self):
         self.api = ApiClient("token")
         self.running = False
         self.timeout = 60
-        self.ollama_client = Client(host=os.getenv("OLLAMA_HOST", "http://ollama:11434"))
+        self._wake = Event()
+        # Replaced on every start, so threads from an earlier run see their own stop signal
+        self._stopped = Event()
+        self._stopped.set()
+        self.thread = None
+        self.ollama_timeout = float(os.getenv("OLLAMA_TIMEOUT", "300"))
+        self.ollama_client = Client(host=os.getenv("OLLAMA_HOST", "http://ollama:11434"), timeout=self.ollama_timeout)
+        self.router = ModelRouter.from_env()
+        self.generation_stats = deque(maxlen=200)
+        self.keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+        self.prompts = PromptBuilder(
+            self.api,
+            prefix_token_budget=int(os.getenv("PROMPT_PREFIX_TOKENS", "256")),
+            max_context_tokens=int(os.getenv("PROMPT_MAX_CONTEXT_TOKENS", "4096")),
+        )
+        self.feed = FeedSync(self.api, capacity=int(os.getenv("FEED_BUFFER_SIZE", "200")))
+        self.dedup = NearDuplicateIndex(
+            min_similarity=float(os.getenv("DEDUP_MIN_SIMILARITY", "0.7")),
+            capacity=int(os.getenv("DEDUP_INDEX_SIZE", "10000")),
+        )
+        self.dedup_attempts = int(os.getenv("DEDUP_REGENERATE_ATTEMPTS", "2"))
+        self.queue = self.create_queue()
+        self.cache = GenerationCache.from_env(self.redelivery_window())
+        self.ai_authors = []
+        self.authors_refresh_interval = float(os.getenv("AUTHORS_REFRESH_SECONDS", "300"))
+        self.activity = ActivityScheduler(
+            mean_interval=float(os.getenv("ACTIVITY_MEAN_INTERVAL_SECONDS", "60")),
+            arrivals=os.getenv("ACTIVITY_ARRIVALS", "poisson"),
+            jitter=float(os.getenv("ACTIVITY_JITTER", "0.2")),
+        )
+        try:
+            self.activity.set_intervals(json.loads(os.getenv("ACTIVITY_AUTHOR_INTERVALS", "{}")))
+        except (ValueError, TypeError, AttributeError) as e:
+            logging.error(f"Ignoring invalid ACTIVITY_AUTHOR_INTERVALS: {e}")
+        self.reaction_limiter = SlidingWindowLimiter(
+            limit=int(os.getenv("MAX_REACTIONS_PER_WINDOW", "10")),
+            window=float(os.getenv("REACTION_WINDOW_SECONDS", "60")),
+        )
+        self.listener = self.create_listener()
+        self.workers = WorkerPool(
+            self.queue,
+            self.process_job,
+            workers=int(os.getenv("GENERATION_WORKERS", "4")),
+            target_latency=float(os.getenv("TARGET_GENERATION_LATENCY", "30")),
+        )
+        self.register_metrics()
+
+    def register_metrics(self):
+        metrics.gauge("queue_depth", self.queue.depth, "Jobs waiting in the generation queue")
+        metrics.gauge("queue_in_flight", self.queue.in_flight, "Jobs taken by a worker and not yet acked")
+        metrics.gauge("concurrency_limit", lambda: self.workers.limiter.limit, "Current adaptive generation concurrency")
+        metrics.gauge("ai_authors", lambda: len(self.ai_authors), "AI authors known to the decision loop")
+        metrics.gauge("running", lambda: int(self.running), "Whether the AI client is running")
+
+    def create_listener(self, redis_client=None):
+        if os.getenv("EVENTS_ENABLED", "true").lower() != "true":
+            return None
+        if redis_client is None:
+            from redis import Redis
+            redis_client = Redis(host=os.getenv("REDIS_HOST", "redis"), port=6379, decode_responses=True)
+        return NewPostListener(
+            redis_client,
+            self.react_to_new_posts,
+            debounce=float(os.getenv("REACTION_DEBOUNCE_SECONDS", "2")),
+        )
+
+    def job_visibility_timeout(self) -> float:
+        """
+        Longest a job can run before the queue redelivers it: every near-duplicate regeneration
+        of the slowest route, with its fallback, running to the route timeout.
+        """
+        generation = max(self.router.max_seconds(task, self.ollama_timeout) for task in list(self.router.routes))
+        return generation * (self.dedup_attempts + 1) + JOB_OVERHEAD_SECONDS
+
+    def redelivery_window(self) -> float:
+        """How long after it is first queued a job can still be redelivered, and so reuse a cached generation."""
+        return self.queue.visibility_timeout * self.queue.max_attempts
+
+    def create_queue(self):
+        visibility_timeout = self.job_visibility_timeout()
+        if os.getenv("WORK_QUEUE", "memory") == "redis":
+            from redis import Redis
+            redis_client = Redis(host=os.getenv("REDIS_HOST", "redis"), port=6379, decode_responses=True)
+            return RedisStreamQueue(redis_client, visibility_timeout=visibility_timeout)
+        return InProcessQueue(visibility_timeout=visibility_timeout)
 
     @staticmethod
     def generate_random_username(length=8):
@@ -31,122 +136,359 @@ class AIClient:
         return f"https://i.pravatar.cc/150?img={random.randint(1, 70)}"
 
     @staticmethod
-    def sanitize_content(content, max_length=500):
+    def sanitize_content(content, max_length=500, max_sentences=None):
         try:
             sanitized_content = " ".join(content.split())
-            # if len(sanitized_content) > max_length:
-            #     sanitized_content = sanitized_content[:max_length].rstrip()
-            return sanitized_content
+            return truncate_content(sanitized_content, max_length, max_sentences)
         except Exception as e:
             logging.error(f"Error sanitizing content: {e}")
             return "Content could not be sanitized properly."
 
-    def generate_ai_content(self, prompt, max_length=2048):
-        try:
-            response = self.ollama_client.generate(model="gemma2:latest", prompt=prompt)
-            raw_content = response.get("response", "No content generated.")
-            logging.info(f"Generated AI content: {raw_content}")
-            sanitized_content = self.sanitize_content(raw_content, max_length)
-            return sanitized_content
-        except Exception as e:
-            logging.error(f"Error generating AI content: {e}")
-            return "Thoughts could not be generated."
-
+    def generate_ai_content(self, prompt, max_length=None, task="post", author=None, job_id=None):
+        """
+        Generate with the model routed for `task`, falling back to the route's second model on an error or timeout.
+        Generations are cached per job, so a redelivered job reuses its text instead of generating it again,
+        while a new job for the same recurring prompt gets fresh content.
+        Raises GenerationFailed when no model returns content, so the job is retried.
+        """
+        budget = TASK_BUDGETS.get(task, TASK_BUDGETS["post"])
+        max_length = max_length or budget["max_length"]
+        route = self.router.route(task)
+        for attempt, model in enumerate(self.router.models(task)):
+            labels = {"task": task, "model": model}
+            persona = self.prompts.generation_kwargs(author, model) if author else {}
+            key = None
+            if job_id is not None:
+                key = cache_key(model, prompt, {
+                    "task": task, "max_length": max_length, "options": route.get("options"),
+                    "system": self.prompts.system_prefix(author) if author else None, "job": job_id,
+                })
+                cached = self.cache.get(task, key)
+                if cached is not None:
+                    logging.info(f"Using cached {task} generation from {model} for job {job_id}.")
+                    return cached
 
-
-    def get_ai_authors(self):
+            try:
+                result = self.stream_with(model, route, prompt, task, max_length, author, persona)
+            except GenerationCancelled:
+                raise
+            except Exception as e:
+                logging.error(f"Error generating {task} with {model}: {e}")
+                self.router.record(task, model, "error", fallback=attempt > 0)
+                metrics.inc("generation_errors_total", labels)
+                continue
+            if result.timed_out:
+                logging.warning(f"Generating {task} with {model} timed out after {result.duration:.1f}s.")
+                self.router.record(task, model, "timeout", result, fallback=attempt > 0)
+                metrics.inc("generation_timeouts_total", labels)
+                continue
+
+            self.router.record(task, model, "ok", result, fallback=attempt > 0)
+            if attempt:
+                metrics.inc("generation_fallbacks_total", labels)
+            content = self.sanitize_content(result.content, max_length, budget["max_sentences"])
+            if not content:
+                logging.warning(f"{model} returned no {task} content.")
+                continue
+            if key is not None:
+                self.cache.set(task, key, content)
+            return content
+        raise GenerationFailed(f"No model could generate {task} content.")
+
+    def stream_with(self, model, route, prompt, task, max_length, author=None, persona=None):
+        persona = persona or {}
+        result = stream_generate(
+            self.ollama_client, model, prompt, task=task, max_length=max_length, options=route.get("options"),
+            should_cancel=self._stopped.is_set, timeout=route.get("timeout"), keep_alive=self.keep_alive,
+            **persona,
+        )
+        if result.cancelled:
+            raise GenerationCancelled(f"{task} generation cancelled after {result.tokens} tokens")
+        if author:
+            self.prompts.record(author, persona, result)
+        self.generation_stats.append(result.to_dict())
+        labels = {"task": task, "model": model}
+        metrics.observe("generation_seconds", result.duration, labels)
+        if result.time_to_first_token is not None:
+            metrics.observe("generation_first_token_seconds", result.time_to_first_token, labels)
+        metrics.observe("generation_tokens_per_second", result.tokens_per_second, labels, buckets=RATE_BUCKETS)
+        metrics.inc("generation_tokens_total", labels, result.tokens)
+        ttft = f"{result.time_to_first_token:.2f}s" if result.time_to_first_token is not None else "n/a"
+        logging.info(
+            f"Generated {task} with {model}: {result.tokens} tokens in {result.duration:.2f}s "
+            f"(first token {ttft}, {result.tokens_per_second:.1f} tokens/s, truncated={result.truncated})"
+        )
+        return result
+
+    def generate_unique(self, prompt, kind, max_length=None, task="post", author=None, job_id=None):
+        """
+        Generate content that does not near-duplicate a known post or comment of `kind`,
+        regenerating up to `dedup_attempts` times. Returns None if every attempt was a duplicate.
+        """
+        for _ in range(self.dedup_attempts + 1):
+            content = self.generate_ai_content(prompt, max_length, task=task, author=author, job_id=job_id)
+            duplicate_of = self.dedup.find(kind, content)
+            if duplicate_of is None:
+                return content
+            logging.info(f"Generated {task} near-duplicates {kind} {duplicate_of}, regenerating.")
+            metrics.inc("generation_duplicates_total", {"task": task})
+            self.router.record_duplicate(task)
+            prompt = f"{prompt}\nSay something different from: \"{content}\""
+        logging.warning(f"Giving up on {task} after {self.dedup_attempts + 1} near-duplicate generations.")
+        return None
+
+    def sync_feed(self):
+        """Fetch new posts and index them so generated content is checked against them."""
+        new_posts = self.feed.sync()
+        for post in new_posts:
+            self.dedup.add("post", post["id"], post["content"])
+        return new_posts
+
+    def get_ai_authors(self, stopped):
         ai_authors = []
-        while not ai_authors and self.running:
+        while not ai_authors and not stopped.is_set():
             try:
                 logging.info("Fetching AI authors...")
                 ai_authors = self.api.fetch_ai_authors()
 
                 if not ai_authors:
-                    logging.warning("No AI authors found. Creating a new one...")
-                    random_username = self.generate_ai_content("Generate a random username without any emoji.", 50)
-                    random_avatar = self.generate_random_avatar()
-                    self.api.add_author(random_username, random_avatar)
-
-                time.sleep(10)
+                    logging.warning("No AI authors found. Queueing a new one...")
+                    self.queue.put(Job("username"))
+                    self.wait(10, stopped)
             except Exception as e:
                 logging.error(f"Error fetching or creating AI authors: {e}")
-                time.sleep(5)
+                self.wait(5, stopped)
 
         return ai_authors
 
-    def add_initial_posts(self, ai_authors):
-        for ai_author in ai_authors:
-            logging.info(ai_author)
-            prompt = (
-                f"Imagine you are a person named {ai_author['username']}, author on a social media platform. "
-                f" Write an engaging first post for them on a topic of your choice."
-            )
-            post_content = self.generate_ai_content(prompt)
-            logging.info(f"Adding post: {post_content}")
-            self.api.add_post(post_content, ai_author["id"])
-
-    def perform_actions(self, ai_authors, posts):
-        for ai_author in ai_authors:
-            if not self.running:
+    def create_author(self, job_id=None):
+        random_username = self.generate_ai_content(
+            "Generate a random username without any emoji.", task="username", job_id=job_id
+        )
+        random_avatar = self.generate_random_avatar()
+        return self.api.add_author(random_username, random_avatar)
+
+    def add_initial_post(self, ai_author, job_id=None):
+        logging.info(ai_author)
+        prompt = (
+            f"Imagine you are a person named {ai_author['username']}, author on a social media platform. "
+            f" Write an engaging first post for them on a topic of your choice."
+        )
+        post_content = self.generate_unique(prompt, "post", task="post", author=ai_author, job_id=job_id)
+        return self.publish_post(post_content, ai_author)
+
+    def add_comment(self, ai_author, post, job_id=None):
+        prompt = (
+            f"As {ai_author['username']}, you are an AI author participating in a vibrant social platform. "
+            f"Read this post: \"{post['content']}\" and write a very brief, thoughtful, personal comment "
+            f"that expresses your perspective or adds value to the discussion. Keep it under 100 words."
+        )
+        for existing in self.feed.thread(post["id"]):
+            self.dedup.add("comment", existing["id"], existing["content"])
+        ai_comment = self.generate_unique(prompt, "comment", task="comment", author=ai_author, job_id=job_id)
+        if ai_comment is None:
+            return None
+        logging.info(f"Adding comment: {ai_comment}")
+        comment = self.api.add_comment(post["id"], ai_comment, ai_author["id"])
+        if comment:
+            self.feed.record_comment(post["id"], comment)
+            self.dedup.add("comment", comment["id"], comment["content"])
+        return comment
+
+    def add_post(self, ai_author, job_id=None):
+        prompt = f"Write a new post for {ai_author['username']}."
+        ai_post = self.generate_unique(prompt, "post", 500, task="post", author=ai_author, job_id=job_id)
+        return self.publish_post(ai_post, ai_author)
+
+    def publish_post(self, content, ai_author):
+        if content is None:
+            return None
+        logging.info(f"Adding post: {content}")
+        post = self.api.add_post(content, ai_author["id"])
+        if post:
+            self.dedup.add("post", post["id"], post["content"])
+        return post
+
+    def process_job(self, job):
+        """Run one queued job; raising makes the queue redeliver it."""
+        if job.type == "username":
+            result = self.create_author(job.id)
+        elif job.type == "comment":
+            result = self.add_comment(job.author, job.payload["post"], job.id)
+        elif job.payload.get("initial"):
+            result = self.add_initial_post(job.author, job.id)
+        else:
+            result = self.add_post(job.author, job.id)
+        if result is None:
+            raise RuntimeError(f"Backend write failed for {job}")
+
+    def react_to_new_posts(self, post_ids):
+        """Queue one comment per announced post from another AI author, within the reaction cap."""
+        self.sync_feed()
+        announced = set(post_ids)
+        posts = [post for post in self.feed.recent_posts() if post["id"] in announced]
+        queued = 0
+        for post in posts:
+            authors = [author for author in self.ai_authors if author["id"] != post.get("author", {}).get("id")]
+            if not authors:
+                continue
+            if not self.reaction_limiter.allow():
+                logging.info(f"Reaction cap reached, leaving posts {post_ids} to the timed cycle.")
                 break
-            action = random.choice(["comment", "post"])
-            if action == "comment":
-                post = random.choice(posts)
-                prompt = (
-                    f"As {ai_author['username']}, you are an AI author participating in a vibrant social platform. "
-                    f"Read this post: \"{post['content']}\" and write a very brief, thoughtful, personal comment "
-                    f"that expresses your perspective or adds value to the discussion. Keep it under 100 words."
-                )
-                ai_comment = self.generate_ai_content(prompt, 200)
-                logging.info(f"Adding comment: {ai_comment}")
-                self.api.add_comment(post["id"], ai_comment, ai_author["id"])
-            elif action == "post":
-                prompt = f"Write a new post for {ai_author['username']}."
-                ai_post = self.generate_ai_content(prompt, 500)
-                logging.info(f"Adding post: {ai_post}")
-                self.api.add_post(ai_post, ai_author["id"])
-
-    def decision_loop(self):
+            queued += self.queue.put(Job("comment", random.choice(authors), {"post": post}))
+        logging.info(f"Queued {queued} reactions to new posts {post_ids}.")
+
+    def plan_actions(self, ai_authors, posts):
+        """Queue one action per author; authors whose previous job is still pending are skipped."""
+        queued = 0
+        for ai_author in ai_authors:
+            target = self.feed.choose_target(ai_author) if random.choice(["comment", "post"]) == "comment" else None
+            if not posts:
+                job = Job("post", ai_author, {"initial": True})
+            elif target:
+                job = Job("comment", ai_author, {"post": target})
+            else:
+                job = Job("post", ai_author)
+            queued += self.queue.put(job)
+        logging.info(f"Queued {queued} jobs for {len(ai_authors)} due AI authors.")
+
+    def decision_loop(self, stopped):
         logging.info("AI decision loop is running...")
+        authors_refreshed_at = feed_synced_at = float("-inf")
+        posts = []
         try:
-            while self.running:
-                ai_authors = self.get_ai_authors()
-                logging.info(f"Found {len(ai_authors)} AI authors.")
-
-                try:
-                    posts = self.api.fetch_posts()
-                except Exception as e:
-                    logging.error(f"Error fetching posts: {e}")
-                    time.sleep(5)
-                    continue
-
-                if not posts:
-                    logging.info("No posts available. Adding a new post.")
-                    self.add_initial_posts(ai_authors)
-                    time.sleep(self.timeout)
-                    continue
-
-                try:
-                    self.perform_actions(ai_authors, posts)
-                except Exception as e:
-                    logging.error(f"Error performing actions: {e}")
-
-                time.sleep(self.timeout)
+            while not stopped.is_set():
+                if time.monotonic() - authors_refreshed_at >= self.authors_refresh_interval:
+                    ai_authors = self.get_ai_authors(stopped)
+                    if stopped.is_set():
+                        break
+                    self.ai_authors = ai_authors
+                    self.activity.sync_authors(ai_authors)
+                    authors_refreshed_at = time.monotonic()
+                    logging.info(f"Found {len(ai_authors)} AI authors.")
+
+                cycle_started_at = time.monotonic()
+                due_authors = self.activity.pop_due()
+                if due_authors:
+                    if time.monotonic() - feed_synced_at >= FEED_SYNC_INTERVAL:
+                        try:
+                            new_posts = self.sync_feed()
+                            posts = self.feed.recent_posts()
+                            feed_synced_at = time.monotonic()
+                            logging.info(f"Synced {len(new_posts)} new posts, {len(posts)} buffered.")
+                        except Exception as e:
+                            logging.error(f"Error fetching posts: {e}")
+
+                    if not posts:
+                        logging.info("No posts available. Queueing first posts.")
+
+                    if stopped.is_set():
+                        break
+                    try:
+                        self.plan_actions(due_authors, posts)
+                    except Exception as e:
+                        logging.error(f"Error planning actions: {e}")
+                    metrics.observe("decision_cycle_seconds", time.monotonic() - cycle_started_at)
+
+                wait = self.activity.seconds_until_next()
+                self.wait(self.timeout if wait is None else min(self.timeout, max(MIN_TICK, wait)), stopped)
         except Exception as e:
             logging.error(f"Error in decision loop: {e}")
 
+    def wait(self, seconds, stopped):
+        """Sleep until `seconds` pass, the run stops or the configuration changes."""
+        if stopped.is_set():
+            return
+        self._wake.wait(seconds)
+        # Only a configuration wake is consumed; start() clears the one left by stop()
+        if not stopped.is_set():
+            self._wake.clear()
+
     def start(self):
         if not self.running:
             logging.info("Starting AI client...")
             self.running = True
-            self.thread = Thread(target=self.decision_loop)
+            self._stopped = Event()
+            self._wake.clear()
+            self.activity.resume()
+            self.workers.start()
+            if self.listener:
+                self.listener.start()
+            self.thread = Thread(target=self.decision_loop, args=(self._stopped,), name="decision-loop", daemon=True)
             self.thread.start()
 
     def stop(self):
+        """
+        Stop within SHUTDOWN_TIMEOUT: waits are interrupted and streaming generations cancelled.
+        Threads still blocked in a backend call are daemons and exit when it returns.
+        """
         if self.running:
             logging.info("Stopping AI client...")
             self.running = False
-            self.thread.join()
+            self._stopped.set()
+            self._wake.set()
+            deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+            self.thread.join(max(0.0, deadline - time.monotonic()))
+            if self.listener:
+                self.listener.stop(max(0.0, deadline - time.monotonic()))
+            self.workers.stop(max(0.0, deadline - time.monotonic()))
+            if self.thread.is_alive():
+                logging.warning("Decision loop still finishing a backend call after shutdown.")
+
+    def config(self) -> dict:
+        return {
+            "routes": {task: self.router.route(task) for task in list(self.router.routes)},
+            "keep_alive": self.keep_alive,
+            "timeout": self.timeout,
+            "authors_refresh_interval": self.authors_refresh_interval,
+            "activity_mean_interval": self.activity.mean_interval,
+            "activity_arrivals": self.activity.arrivals,
+            "activity_author_intervals": dict(self.activity.intervals),
+            "workers": self.workers.workers,
+            "target_latency": self.workers.limiter.target_latency,
+            "max_reactions_per_window": self.reaction_limiter.limit,
+        }
+
+    def configure(self, **changes) -> dict:
+        """Apply runtime changes; raises ValueError without applying anything if a value is invalid."""
+        for name in ("timeout", "authors_refresh_interval", "activity_mean_interval", "target_latency"):
+            if name in changes and changes[name] <= 0:
+                raise ValueError(f"{name} must be positive.")
+        if "workers" in changes and changes["workers"] < 1:
+            raise ValueError("workers must be at least 1.")
+        if "max_reactions_per_window" in changes and changes["max_reactions_per_window"] < 0:
+            raise ValueError("max_reactions_per_window must not be negative.")
+        if changes.get("activity_arrivals", "poisson") not in ("poisson", "uniform"):
+            raise ValueError("activity_arrivals must be 'poisson' or 'uniform'.")
+        for author_id, interval in changes.get("activity_author_intervals", {}).items():
+            if interval is not None and interval <= 0:
+                raise ValueError(f"activity_author_intervals for author {author_id} must be positive.")
+
+        # Validated and applied as a whole, so a bad route leaves everything unchanged
+        if "routes" in changes:
+            self.router.update(changes["routes"])
+        if "model" in changes:
+            self.router.use_model(changes["model"])
+        if "routes" in changes or "model" in changes:
+            self.queue.visibility_timeout = self.job_visibility_timeout()
+            self.cache.set_ttl(self.redelivery_window())
+        for name in ("keep_alive", "timeout", "authors_refresh_interval"):
+            if name in changes:
+                setattr(self, name, changes[name])
+        if "activity_mean_interval" in changes:
+            self.activity.mean_interval = changes["activity_mean_interval"]
+        if "activity_arrivals" in changes:
+            self.activity.arrivals = changes["activity_arrivals"]
+        if "activity_author_intervals" in changes:
+            self.activity.set_intervals(changes["activity_author_intervals"])
+        if "max_reactions_per_window" in changes:
+            self.reaction_limiter.limit = changes["max_reactions_per_window"]
+        if "workers" in changes or "target_latency" in changes:
+            self.workers.resize(changes.get("workers"), changes.get("target_latency"))
+        logging.info(f"Configuration updated: {changes}")
+        # Wake the decision loop so a shorter cadence applies now rather than after the current wait
+        self._wake.set()
+        return self.config()
 
 
 client = AIClient()
@@ -166,6 +508,22 @@ async def lifespan(app: FastAPI):
 app = FastAPI(lifespan=lifespan)
 
 
+class ConfigUpdate(BaseModel):
+    # Sends every task to this model; `routes` changes tasks individually
+    model: Optional[str] = None
+    routes: Optional[Dict[str, Dict[str, Any]]] = None
+    keep_alive: Optional[str] = None
+    timeout: Optional[float] = None
+    authors_refresh_interval: Optional[float] = None
+    activity_mean_interval: Optional[float] = None
+    activity_arrivals: Optional[str] = None
+    # Mean seconds between actions per author ID; null restores activity_mean_interval
+    activity_author_intervals: Optional[Dict[int, Optional[float]]] = None
+    workers: Optional[int] = None
+    target_latency: Optional[float] = None
+    max_reactions_per_window: Optional[int] = None
+
+
 @app.post("/start")
 def start_client():
     if client.running:
@@ -184,4 +542,43 @@ def stop_client():
 
 @app.get("/status")
 def status():
-    return {"running": client.running}
+    return {
+        "running": client.running,
+        "config": client.config(),
+        "cache": client.cache.stats(),
+        "workers": client.workers.stats(),
+        "activity": client.activity.stats(),
+        "prompts": client.prompts.stats(),
+        "dedup": client.dedup.stats(),
+        "routes": client.router.stats(),
+    }
+
+
+@app.get("/config")
+def get_config():
+    return client.config()
+
+
+@app.put("/config")
+def update_config(update: ConfigUpdate):
+    try:
+        return client.configure(**update.model_dump(exclude_none=True))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    return metrics.render()
+
+
+@app.get("/profile", response_class=PlainTextResponse)
+def profile(seconds: float = 5.0, thread: str = "decision-loop", interval: float = 0.01):
+    """
+    Sample the stacks of the decision thread (or `thread=generator` for the workers) for a few
+    seconds. Returns collapsed stacks with sample counts, ready for flamegraph.pl or speedscope.
+    """
+    if not 0 < seconds <= 60:
+        raise HTTPException(status_code=400, detail="seconds must be between 0 and 60.")
+    samples = sample_threads(thread, seconds, max(interval, 0.001))
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Tests import the service's modules the way main.py does, e.g. `from lib.api import ApiClient`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing main builds the module-level client; keep it off disk, Redis and the event channel
+os.environ.setdefault("GENERATION_CACHE", "off")
+os.environ.setdefault("WORK_QUEUE", "memory")
+os.environ.setdefault("EVENTS_ENABLED", "false")
@@ -0,0 +1,30 @@
+import pytest
+
+from lib.activity import ActivityScheduler
+
+
+def test_author_intervals_override_the_mean_until_cleared():
+    scheduler = ActivityScheduler(mean_interval=60.0, arrivals="uniform", jitter=0.0)
+    scheduler.set_intervals({"1": 10.0})
+    assert scheduler.interval(1) == 10.0
+    assert scheduler.interval(2) == 60.0
+
+    scheduler.set_intervals({1: None})
+    assert scheduler.interval(1) == 60.0
+
+
+def test_invalid_author_interval_changes_nothing():
+    scheduler = ActivityScheduler(mean_interval=60.0)
+    with pytest.raises(ValueError):
+        scheduler.set_intervals({1: 10.0, 2: 0})
+    assert scheduler.intervals == {}
+
+
+def test_author_intervals_survive_the_author_leaving():
+    scheduler = ActivityScheduler(mean_interval=60.0, arrivals="uniform", jitter=0.0)
+    scheduler.set_intervals({1: 10.0})
+    scheduler.sync_authors([{"id": 1}])
+    scheduler.sync_authors([])
+    assert scheduler.stats()["expected_actions_per_minute"] == 0
+    scheduler.sync_authors([{"id": 1}])
+    assert scheduler.stats()["expected_actions_per_minute"] == 6.0
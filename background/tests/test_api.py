@@ -0,0 +1,177 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from lib.api import ApiClient, ApiError, AsyncApiClient, CircuitOpenError
+
+
+class Handler(BaseHTTPRequestHandler):
+    def _respond(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path))
+            status, delay = server.responses.pop(0) if len(server.responses) > 1 else server.responses[0]
+        time.sleep(delay)
+        body = json.dumps({"status": status}).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except OSError:
+            # The client gave up on a slow response
+            pass
+
+    do_GET = do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class Backend(ThreadingHTTPServer):
+    """Local stand-in for the backend that answers with scripted (status, delay) pairs, repeating the last one."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.lock = threading.Lock()
+        self.requests = []
+        self.responses = [(200, 0.0)]
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def script(self, *responses):
+        with self.lock:
+            self.responses = [response if isinstance(response, tuple) else (response, 0.0) for response in responses]
+
+
+@pytest.fixture
+def backend():
+    server = Backend()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(backend):
+    api = ApiClient("token", base_url=backend.url, timeout=0.2, retries=2)
+    api.backoff_base = 0.0
+    api.breaker.failure_threshold = 2
+    api.breaker.reset_timeout = 0.2
+    yield api
+    api.close()
+
+
+def test_returns_json(client, backend):
+    assert client._request("GET", "/posts") == {"status": 200}
+    assert backend.requests == [("GET", "/posts")]
+
+
+def test_timeout_is_retried_then_raises(client, backend):
+    backend.script((200, 1.0))
+    with pytest.raises(ApiError):
+        client._request("GET", "/posts")
+    assert len(backend.requests) == client.retries + 1
+
+
+def test_retries_transient_status(client, backend):
+    backend.script(503, 502, 200)
+    assert client._request("GET", "/posts") == {"status": 200}
+    assert len(backend.requests) == 3
+    assert client.breaker.failures == 0
+
+
+def test_does_not_retry_post_on_server_error(client, backend):
+    backend.script(502)
+    with pytest.raises(ApiError) as error:
+        client._request("POST", "/posts", idempotent=False, json={})
+    assert error.value.status_code == 502
+    assert len(backend.requests) == 1
+
+
+def test_does_not_retry_post_on_timeout(client, backend):
+    backend.script((200, 1.0))
+    with pytest.raises(ApiError):
+        client._request("POST", "/posts", idempotent=False, json={})
+    assert len(backend.requests) == 1
+
+
+def test_retries_post_when_not_processed(client, backend):
+    backend.script(503, 200)
+    assert client._request("POST", "/posts", idempotent=False, json={}) == {"status": 200}
+    assert len(backend.requests) == 2
+
+
+def test_records_one_failure_per_call(client, backend):
+    backend.script(503)
+    with pytest.raises(ApiError):
+        client._request("GET", "/posts")
+    assert len(backend.requests) == client.retries + 1
+    assert client.breaker.failures == 1
+    assert client.breaker.state == "closed"
+
+
+def test_circuit_opens_and_fails_fast(client, backend):
+    backend.script(500)
+    for _ in range(2):
+        with pytest.raises(ApiError):
+            client._request("GET", "/posts")
+    assert client.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        client._request("GET", "/posts")
+    assert len(backend.requests) == 2
+
+
+def test_half_open_trial_success_closes_circuit(client, backend):
+    backend.script(500)
+    for _ in range(2):
+        with pytest.raises(ApiError):
+            client._request("GET", "/posts")
+    time.sleep(client.breaker.reset_timeout)
+    assert client.breaker.state == "half-open"
+    backend.script(200)
+    assert client._request("GET", "/posts") == {"status": 200}
+    assert client.breaker.state == "closed"
+
+
+def test_half_open_trial_failure_reopens_circuit(client, backend):
+    backend.script(500)
+    for _ in range(2):
+        with pytest.raises(ApiError):
+            client._request("GET", "/posts")
+    time.sleep(client.breaker.reset_timeout)
+    with pytest.raises(ApiError):
+        client._request("GET", "/posts")
+    assert client.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        client._request("GET", "/posts")
+    assert len(backend.requests) == 3
+
+
+def test_async_client_records_one_failure_per_call(backend):
+    backend.script(503)
+
+    async def call():
+        api = AsyncApiClient("token", base_url=backend.url, timeout=0.2, retries=2)
+        api.backoff_base = 0.0
+        try:
+            with pytest.raises(ApiError):
+                await api._request("GET", "/posts")
+        finally:
+            await api.close()
+        return api
+
+    api = asyncio.run(call())
+    assert len(backend.requests) == 3
+    assert api.breaker.failures == 1
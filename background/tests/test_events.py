@@ -0,0 +1,128 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from lib.events import NewPostListener, SlidingWindowLimiter
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class Batches:
+    def __init__(self):
+        self.batches = []
+        self.received = threading.Event()
+
+    def __call__(self, post_ids):
+        self.batches.append((time.monotonic(), post_ids))
+        self.received.set()
+
+
+class FailingPubSub:
+    def subscribe(self, channel):
+        pass
+
+    def get_message(self, timeout=None):
+        raise ConnectionError("connection lost")
+
+    def close(self):
+        pass
+
+
+class FlakyRedis:
+    """Fake Redis whose first subscription drops, to exercise the reconnect."""
+
+    def __init__(self, client):
+        self.client = client
+        self.subscriptions = 0
+
+    def pubsub(self, **kwargs):
+        self.subscriptions += 1
+        return FailingPubSub() if self.subscriptions == 1 else self.client.pubsub(**kwargs)
+
+
+def wait_for_subscriber(client, channel="new_post", timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while dict(client.pubsub_numsub(channel)).get(channel.encode(), 0) < 1:
+        assert time.monotonic() < deadline, "listener never subscribed"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis()
+
+
+def test_parse_post_id():
+    assert NewPostListener.parse_post_id("Post 42 added!") == 42
+    assert NewPostListener.parse_post_id(b"Post 7 added!") == 7
+    assert NewPostListener.parse_post_id("hello") is None
+
+
+def test_burst_of_posts_is_flushed_as_one_batch(redis_client):
+    on_posts = Batches()
+    listener = NewPostListener(redis_client, on_posts, debounce=0.2, poll_interval=0.01)
+    listener.start()
+    try:
+        wait_for_subscriber(redis_client)
+        published_at = time.monotonic()
+        for post_id in (1, 2, 3):
+            redis_client.publish("new_post", f"Post {post_id} added!")
+        redis_client.publish("new_post", "not a post")
+        assert on_posts.received.wait(2)
+        time.sleep(0.3)
+    finally:
+        listener.stop(1)
+    assert [post_ids for _, post_ids in on_posts.batches] == [[1, 2, 3]]
+    assert on_posts.batches[0][0] - published_at >= 0.2
+
+
+def test_listener_reconnects_after_a_pubsub_error(redis_client):
+    on_posts = Batches()
+    flaky = FlakyRedis(redis_client)
+    listener = NewPostListener(flaky, on_posts, debounce=0.0, poll_interval=0.01, reconnect_delay=0.01)
+    listener.start()
+    try:
+        wait_for_subscriber(redis_client)
+        redis_client.publish("new_post", "Post 9 added!")
+        assert on_posts.received.wait(2)
+    finally:
+        listener.stop(1)
+    assert flaky.subscriptions == 2
+    assert on_posts.batches[0][1] == [9]
+
+
+def test_stop_ends_the_listener_thread(redis_client):
+    listener = NewPostListener(redis_client, Batches(), poll_interval=0.01)
+    listener.start()
+    thread = listener._thread
+    listener.stop(1)
+    assert not thread.is_alive()
+
+
+def test_sliding_window_limiter():
+    limiter = SlidingWindowLimiter(limit=2, window=0.1)
+    assert limiter.allow() and limiter.allow()
+    assert not limiter.allow()
+    time.sleep(0.11)
+    assert limiter.allow()
+
+
+def test_reactions_are_capped_per_window():
+    main = pytest.importorskip("main")
+    posts = [{"id": post_id, "author": {"id": 1}} for post_id in range(1, 6)]
+    jobs = []
+    client = SimpleNamespace(
+        sync_feed=lambda: [],
+        feed=SimpleNamespace(recent_posts=lambda: posts),
+        ai_authors=[{"id": 1}, {"id": 2}],
+        reaction_limiter=SlidingWindowLimiter(limit=3, window=60),
+        queue=SimpleNamespace(put=lambda job: jobs.append(job) or True),
+    )
+    main.AIClient.react_to_new_posts(client, [post["id"] for post in posts])
+    assert [job.payload["post"]["id"] for job in jobs] == [1, 2, 3]
+    # Authors never react to their own posts
+    assert all(job.type == "comment" and job.author["id"] == 2 for job in jobs)
+    main.AIClient.react_to_new_posts(client, [4, 5])
+    assert len(jobs) == 3
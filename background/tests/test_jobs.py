@@ -0,0 +1,118 @@
+import time
+
+import pytest
+
+from lib.jobs import InProcessQueue, Job, RedisStreamQueue
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def post(author_id=1):
+    return Job("post", {"id": author_id})
+
+
+def comment(author_id=2):
+    return Job("comment", {"id": author_id}, {"post": {"id": 1}})
+
+
+class LateArrivals:
+    """Redis whose entries only show up to the blocking read, as when they arrive while get() waits."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def xreadgroup(self, *args, block=None, **kwargs):
+        if block is None:
+            return []
+        return self.client.xreadgroup(*args, block=block, **kwargs)
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def test_in_process_queue_orders_by_priority_and_dedups():
+    queue = InProcessQueue()
+    assert queue.put(post())
+    assert not queue.put(post())
+    assert queue.put(comment())
+    assert queue.get(timeout=0).type == "comment"
+    assert queue.get(timeout=0).type == "post"
+    assert queue.get(timeout=0) is None
+
+
+def test_in_process_queue_redelivers_unacked_jobs_as_attempts():
+    queue = InProcessQueue(visibility_timeout=0.05, max_attempts=2)
+    queue.put(post())
+    assert queue.get(timeout=0).attempts == 0
+    time.sleep(0.06)
+    assert queue.get(timeout=0).attempts == 1
+    time.sleep(0.06)
+    assert queue.get(timeout=0) is None
+    # The dropped job released its key
+    assert queue.put(post())
+
+
+def test_in_process_queue_ack_and_nack():
+    queue = InProcessQueue(max_attempts=2)
+    queue.put(post())
+    job = queue.get(timeout=0)
+    queue.nack(job)
+    assert queue.get(timeout=0).attempts == 1
+    queue.ack(job)
+    assert queue.in_flight() == 0
+    assert queue.put(post())
+
+
+def test_redis_queue_orders_by_priority_and_dedups(redis_client):
+    queue = RedisStreamQueue(redis_client)
+    assert queue.put(post())
+    assert not queue.put(post())
+    assert queue.put(comment())
+    first = queue.get(timeout=0)
+    assert first.type == "comment"
+    queue.ack(first)
+    assert queue.get(timeout=0).type == "post"
+
+
+def test_redis_queue_keeps_every_entry_of_a_multi_stream_read(redis_client):
+    queue = RedisStreamQueue(LateArrivals(redis_client))
+    queue.put(post())
+    queue.put(comment())
+    jobs = [queue.get(timeout=0), queue.get(timeout=0)]
+    assert [job.type for job in jobs] == ["comment", "post"]
+    assert queue.get(timeout=0) is None
+    for job in jobs:
+        queue.ack(job)
+    assert queue.in_flight() == 0
+
+
+def test_redis_queue_redelivers_unacked_jobs_as_attempts(redis_client):
+    worker = RedisStreamQueue(redis_client, consumer="worker", visibility_timeout=0.05, max_attempts=2)
+    rescuer = RedisStreamQueue(redis_client, consumer="rescuer", visibility_timeout=0.05, max_attempts=2)
+    worker.put(post())
+    assert worker.get(timeout=0).attempts == 0
+    time.sleep(0.06)
+    redelivered = rescuer.get(timeout=0)
+    assert redelivered.attempts == 1
+    time.sleep(0.06)
+    assert rescuer.get(timeout=0) is None
+    assert worker.in_flight() == 0
+    # The dropped job released its dedup key
+    assert worker.put(post())
+
+
+def test_redis_queue_nack_requeues_until_max_attempts(redis_client):
+    queue = RedisStreamQueue(redis_client, max_attempts=2)
+    queue.put(post())
+    queue.nack(queue.get(timeout=0))
+    job = queue.get(timeout=0)
+    assert job.attempts == 1
+    queue.nack(job)
+    assert queue.get(timeout=0) is None
+    assert queue.depth() == 0
+    assert queue.put(post())
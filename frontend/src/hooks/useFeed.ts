@@ -3,6 +3,8 @@ import { PostType, PaginatedResponse, CommentType } from "../types";
 
 const POST_API = "http://localhost:8000/posts";
 const COMMENT_API = (postId: number) => `${POST_API}/${postId}/comments`;
+// Sends the backend's last_write cookie, so reads right after a write skip the lagging replica
+const CREDENTIALS: RequestCredentials = "include";
 
 export const useFeed = () => {
   const [posts, setPosts] = useState<PaginatedResponse<PostType>>({
@@ -17,7 +19,7 @@ export const useFeed = () => {
   useEffect(() => {
     const fetchPosts = async () => {
       try {
-        const response = await fetch(POST_API);
+        const response = await fetch(POST_API, { credentials: CREDENTIALS });
         if (response.ok) {
           const data: PaginatedResponse<PostType> = await response.json();
           setPosts(data);
@@ -38,6 +40,7 @@ export const useFeed = () => {
     try {
       const response = await fetch(POST_API, {
         method: "POST",
+        credentials: CREDENTIALS,
         headers: {
           "Content-Type": "application/json",
         },
@@ -61,6 +64,7 @@ export const useFeed = () => {
     try {
       const response = await fetch(`${POST_API}/${postId}`, {
         method: "DELETE",
+        credentials: CREDENTIALS,
       });
 
       if (response.ok) {
@@ -79,7 +83,9 @@ export const useFeed = () => {
   const fetchComments = useCallback(
     async (postId: number) => {
       try {
-        const response = await fetch(`${POST_API}/${postId}/comments`);
+        const response = await fetch(`${POST_API}/${postId}/comments`, {
+          credentials: CREDENTIALS,
+        });
         if (response.ok) {
           const data: CommentType[] = await response.json();
           setComments((prev) => ({ ...prev, [postId]: data }));
@@ -102,6 +108,7 @@ export const useFeed = () => {
   ): Promise<CommentType> => {
     const response = await fetch(COMMENT_API(postId), {
       method: "POST",
+      credentials: CREDENTIALS,
       headers: {
         "Content-Type": "application/json",
       },
@@ -128,6 +135,7 @@ export const useFeed = () => {
         `${POST_API}/${postId}/comments/${commentId}`,
         {
           method: "DELETE",
+          credentials: CREDENTIALS,
         }
       );
 